@@ -1,325 +1,290 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, Response
+from flask import Flask, render_template, request, redirect, url_for, flash, Response, jsonify, abort, stream_with_context, g
+from werkzeug.utils import secure_filename
 import pandas as pd
 import os
+import math
+import uuid
 from datetime import datetime
-import fitz
-import pdfplumber
-import re
-from PIL import Image
 import pytesseract
-import io
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
+from parse_cache import ParseCache, file_digest
+from ocr_engine import OCREngine
+from jobs import JobQueue, Upload
+from extraction import DEFAULT_BACKEND
+from statement_parser import StatementParser, KEYWORDS_TO_CATEGORY, print_report
+from store import TransactionStore
+from duplicates import DuplicateMatcher
+from exports import csv_chunks, write_xlsx, write_parquet, file_export, file_chunks
+from charts import ChartCache, FORMATS as CHART_FORMATS
+from metrics import METRICS, span
+import cProfile
+import time
 
 # --- Configure Tesseract Path ---
-pytesseract.pytesseract.tesseract_cmd = r'C:\Users\ferna\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
+TESSERACT_CMD = r'C:\Users\ferna\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
 app = Flask(__name__)
 app.secret_key = 'the_final_complete_app_key'
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['PARSE_CACHE_FOLDER'] = 'parse_cache'
+app.config['PARSE_CACHE_MAX_BYTES'] = 64 * 1024 * 1024
+# Each OCR worker holds one 300 dpi page (~25 MB) at a time; keep this modest.
+app.config['OCR_WORKERS'] = min(4, os.cpu_count() or 1)
+app.config['OCR_DPI'] = 300
+# Text extraction backend: 'pymupdf' (fast) or 'pdfplumber'; the other is the fallback.
+app.config['PDF_BACKEND'] = DEFAULT_BACKEND
+# Files parsed at the same time; OCR inside each file still uses the OCR pool.
+app.config['PARSE_WORKERS'] = 2
+app.config['DATABASE'] = 'transactions.db'
+# Near-duplicates from different statements (same amount, dates a few days
+# apart, similar description): 'flag' them for review, 'merge' them away, or None.
+app.config['DUPLICATE_MODE'] = 'flag'
+app.config['DUPLICATE_WINDOW_DAYS'] = 3
+app.config['DUPLICATE_THRESHOLD'] = 0.85
+# Lets any request add ?profile=1 to dump a cProfile of itself (and, for an
+# upload, of each file's parse) into PROFILE_FOLDER. Keep off in production.
+app.config['ALLOW_PROFILING'] = False
+app.config['PROFILE_FOLDER'] = 'profiles'
 
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
-consolidated_data = pd.DataFrame()
+parse_cache = ParseCache(app.config['PARSE_CACHE_FOLDER'], app.config['PARSE_CACHE_MAX_BYTES'])
+ocr_engine = OCREngine(max_workers=app.config['OCR_WORKERS'], dpi=app.config['OCR_DPI'], tesseract_cmd=TESSERACT_CMD)
 
-def flexible_date_parser(date_str, year):
-    date_str = re.sub(r',', '', date_str).strip()
-    formats_to_try = ['%B %d %Y', '%b %d %Y', '%d %b %Y']
-    for fmt in formats_to_try:
-        try:
-            if len(date_str.split()) < 3:
-                return datetime.strptime(f"{date_str} {year}", fmt)
-            else:
-                return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    return None
-
-KEYWORDS_TO_CATEGORY = {
-    "grab": "Transport", "mcdonald": "Food", "jollibee": "Food", "meralco": "Utilities",
-    "globe": "Utilities", "sm": "Groceries", "watsons": "Health", "7-eleven": "Groceries",
-    "shopee": "Shopping", "lazada": "Shopping", "netflix": "Entertainment", "venchi": "Dining",
-    "rustic": "Dining", "barbers": "Personal Care", "petron": "Fuel", "google": "Subscriptions",
-    "manam": "Dining", "philippine airl": "Travel", "hotel": "Travel", "landers": "Groceries",
-    "starbucks": "Dining", "waltermart": "Groceries", "cafe": "Dining", "sony": "Entertainment",
-    "playstation": "Entertainment", "steam": "Entertainment", "nike": "Shopping", "uniqlo": "Shopping",
-    "decathlon": "Shopping", "handyman": "Shopping", "naati": "Miscellaneous"
-}
-
-# In app.py, replace the entire parse_text_based_pdf function with this:
-
-def parse_text_based_pdf(filepath, filename):
-    full_text = ""
-    # --- This is the corrected try-except block using the correct exception ---
-    try:
-        with pdfplumber.open(filepath) as pdf:
-            for page in pdf.pages:
-                full_text += page.extract_text() or ""
-    except pdfplumber.utils.exceptions.PdfminerException as e:
-        # This is the correct exception that handles password errors from the underlying library.
-        if "PDFPasswordIncorrect" in str(e):
-            flash(f'Could not process "{filename}" because it is password-protected.', 'danger')
-        else:
-            flash(f'A PDF parsing error occurred with "{filename}": {e}', 'warning')
-        return pd.DataFrame()
-    except Exception as e:
-        # Catch any other unexpected errors
-        flash(f'An unexpected error occurred while processing "{filename}": {e}', 'danger')
-        return pd.DataFrame()
-
-    if not full_text.strip(): return pd.DataFrame()
-
-    expenses = []
-    # This pattern is tuned for clean, text-based PDF data (BPI, Maya)
-    pattern = re.compile(r"^(?:\w+\s\d{1,2}|\d{1,2}\s\w{3})\s+(\w+\s\d{1,2}|\d{1,2}\s\w{3})\s+(.+?)\s+([\d,.-]+\.\d{2}$)")
-    year_match = re.search(r'\b(20\d{2})\b', full_text)
-    statement_year = int(year_match.group(1)) if year_match else datetime.now().year
-
-    for line in full_text.split('\n'):
-        match = pattern.search(line.strip())
-        if match:
-            date_to_parse, description, amount_str = match.groups()
-            date = flexible_date_parser(date_to_parse, statement_year)
-            if date and float(amount_str.replace(",", "")) >= 0:
-                desc_lower = description.lower()
-                category = "Uncategorized"
-                for keyword, cat in KEYWORDS_TO_CATEGORY.items():
-                    if keyword in desc_lower: category = cat; break
-                expenses.append({"Date": date, "Description": description, "Amount": float(amount_str.replace(",", "")), "Category": category, "Source": filename})
-    return pd.DataFrame(expenses)
-
-# In app.py, replace the existing parse_image_based_pdf_with_ocr function
-
-def parse_image_based_pdf_with_ocr(filepath, filename):
-    print(f"Attempting to parse {filename} using OCR...")
-    full_text = ""
-    try:
-        with fitz.open(filepath) as doc:
-            for page in doc:
-                pix = page.get_pixmap(dpi=300)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                full_text += pytesseract.image_to_string(img)
-    except ValueError as e:
-        if "encrypted" in str(e):
-            flash(f'Could not process "{filename}" because it is encrypted/password-protected.', 'danger')
-        else:
-            flash(f'An unexpected value error occurred with "{filename}": {e}', 'warning')
-        return pd.DataFrame()
-    except Exception as e:
-        flash(f'An unexpected error occurred during OCR processing of "{filename}": {e}', 'danger')
-        return pd.DataFrame()
-    
-    if not full_text.strip(): return pd.DataFrame()
-
-    expenses = []
-    
-    # --- FINAL, MOST ROBUST PARSER: A line-by-line state machine ---
-    date_pattern = re.compile(r"^(\w{3}\s\d{1,2},\s\d{4})")
-    amount_pattern = re.compile(r"PHP\s*(-?[\d,]+\.\d{2})")
-    
-    year_match = re.search(r'\b(20\d{2})\b', full_text)
-    statement_year = int(year_match.group(1)) if year_match else datetime.now().year
-
-    current_transaction = None
-
-    for line in full_text.split('\n'):
-        line = line.strip()
-        if not line:
-            continue
-
-        date_match = date_pattern.search(line)
-        amount_match = amount_pattern.search(line)
-
-        # If we find a date, it marks the start of a new transaction
-        if date_match:
-            # If we were already building a transaction, save it before starting a new one
-            if current_transaction and 'Amount' in current_transaction:
-                # Clean up description before saving
-                current_transaction['Description'] = re.sub(r'\s+', ' ', current_transaction.get('Description', '')).strip()
-                if "Interest" not in current_transaction['Description'] and "Charge" not in current_transaction['Description'] and "Fee" not in current_transaction['Description']:
-                    expenses.append(current_transaction)
-
-            # Start a new transaction
-            date_str = date_match.group(1)
-            date = flexible_date_parser(date_str, statement_year)
-            current_transaction = {'Date': date, 'Description': '', 'Amount': None, 'Source': filename}
-            
-            # The rest of the line (if any) is part of the description
-            description_part = date_pattern.sub('', line).strip()
-            if description_part:
-                current_transaction['Description'] += description_part + ' '
+# All transactions live here; safe to share between threads and worker processes.
+duplicate_matcher = None
+if app.config['DUPLICATE_MODE']:
+    duplicate_matcher = DuplicateMatcher(app.config['DUPLICATE_MODE'], app.config['DUPLICATE_WINDOW_DAYS'],
+                                         app.config['DUPLICATE_THRESHOLD'])
+store = TransactionStore(app.config['DATABASE'], duplicates=duplicate_matcher)
+charts = ChartCache(store)
 
-        # If we find an amount, it marks the end of the current transaction
-        elif amount_match and current_transaction:
-            amount_str = amount_match.group(1)
-            amount = float(amount_str.replace(",", ""))
-            
-            # The part of the line before the amount is also part of the description
-            description_part = amount_pattern.sub('', line).strip()
-            if description_part:
-                current_transaction['Description'] += description_part
-
-            # Only assign amount if it's a purchase (not a payment)
-            if amount >= 0:
-                 current_transaction['Amount'] = amount
-
-        # If it's not a date or amount line, it must be part of the description
-        elif current_transaction:
-            current_transaction['Description'] += line + ' '
-
-    # Save the very last transaction after the loop finishes
-    if current_transaction and 'Amount' in current_transaction and current_transaction['Amount'] is not None:
-        current_transaction['Description'] = re.sub(r'\s+', ' ', current_transaction.get('Description', '')).strip()
-        if "Interest" not in current_transaction['Description'] and "Charge" not in current_transaction['Description'] and "Fee" not in current_transaction['Description']:
-            expenses.append(current_transaction)
-
-    # Final categorization step
-    for expense in expenses:
-        desc_lower = expense['Description'].lower()
-        category = "Uncategorized"
-        for keyword, cat in KEYWORDS_TO_CATEGORY.items():
-            if keyword in desc_lower:
-                category = cat
-                break
-        expense['Category'] = category
-
-    return pd.DataFrame(expenses)
+statement_parser = StatementParser(ocr_engine, parse_cache, app.config['PDF_BACKEND'])
 
 # --- This is the new, more robust dispatcher function ---
-def process_pdf_final(filepath):
-    filename = os.path.basename(filepath)
-    
-    # Method 1: Attempt to parse as a standard text-based PDF (for BPI, Maya, etc.)
-    print(f"Attempting text-based parsing for {filename}...")
-    expenses = parse_text_based_pdf(filepath, filename)
-    if not expenses.empty:
-        print(f"Success with text-based parsing for {filename}.")
-        return expenses
-        
-    # Method 2: If text-based fails, fallback to the OCR method (for UnionBank)
-    print(f"Text-based parsing for {filename} failed or found no data. Falling back to OCR.")
-    expenses_ocr = parse_image_based_pdf_with_ocr(filepath, filename)
-    if not expenses_ocr.empty:
-        print(f"Success with OCR parsing for {filename}.")
-        return expenses_ocr
-        
-    # If both methods fail
-    print(f"Could not extract transactions from {filename} with any method.")
-    return pd.DataFrame()
+def process_pdf_final(upload, report=print_report):
+    return statement_parser.process(upload.path, report, upload.content_hash, upload.filename)
+
+def merge_new_data(upload, new_data, report=print_report):
+    with span('merge', rows=len(new_data)):
+        # Exact duplicates are skipped by the store; near-duplicates flagged or merged.
+        added = store.add(new_data, report)
+        # Remember the file too, so the ingest tool doesn't parse it again.
+        store.mark_ingested(upload.content_hash, upload.filename, added)
+    return added
+
+job_queue = JobQueue(process_pdf_final, merge_new_data, max_workers=app.config['PARSE_WORKERS'])
+
+# --- Profiling switch: ?profile=1 on any single request ---
+def profiling_requested():
+    return app.config['ALLOW_PROFILING'] and request.args.get('profile') == '1'
+
+@app.before_request
+def start_profile():
+    if profiling_requested():
+        os.makedirs(app.config['PROFILE_FOLDER'], exist_ok=True)
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+@app.after_request
+def stop_profile(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        path = os.path.join(app.config['PROFILE_FOLDER'], f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint}.prof")
+        profiler.dump_stats(path)
+        response.headers['X-Profile'] = path
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/', methods=['GET', 'POST'])
 def upload_page():
-    global consolidated_data
     if request.method == 'POST':
         files = request.files.getlist('files[]')
         if not files or files[0].filename == '':
             flash('No files selected for uploading', 'warning')
             return redirect(request.url)
+        # Each upload gets its own folder, so two statements with the same name
+        # can't overwrite each other before they're parsed.
+        job_id = uuid.uuid4().hex
+        job_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
+        uploads = []
         for file in files:
             if file and file.filename.endswith('.pdf'):
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], file.filename)
+                os.makedirs(job_folder, exist_ok=True)
+                name = secure_filename(file.filename) or 'statement.pdf'
+                if any(os.path.basename(u.path) == name for u in uploads):
+                    name = f"{len(uploads)}-{name}"
+                filepath = os.path.join(job_folder, name)
                 file.save(filepath)
-                new_data = process_pdf_final(filepath)
-                if new_data is not None and not new_data.empty:
-                    consolidated_data = pd.concat([consolidated_data, new_data], ignore_index=True)
-                    flash(f'Successfully processed {file.filename}', 'success')
-                else:
-                    flash(f'Could not extract any transactions from {file.filename}. The format might be unsupported.', 'danger')
+                uploads.append(Upload(filepath, file.filename, file_digest(filepath)))
             else:
                 flash(f'Invalid file format for {file.filename}. Only PDFs are allowed.', 'warning')
-        if not consolidated_data.empty:
-            consolidated_data['Date'] = pd.to_datetime(consolidated_data['Date'])
-            consolidated_data = consolidated_data.drop_duplicates(subset=['Date', 'Description', 'Amount', 'Source']).sort_values(by='Date', ascending=False)
-        return redirect(url_for('results_page'))
+        if not uploads:
+            return redirect(url_for('results_page'))
+        # Parsing happens in the background; hand back the job id straight away.
+        # The parse runs on a job thread, so profile it there rather than in this request.
+        profile_folder = app.config['PROFILE_FOLDER'] if profiling_requested() else None
+        job = job_queue.submit(uploads, job_id=job_id, profile_folder=profile_folder)
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify({'job_id': job.id, 'status_url': url_for('job_status', job_id=job.id)}), 202
+        if request.form.get('timings'):
+            return redirect(url_for('results_page', job=job.id, timings=1))
+        return redirect(url_for('results_page', job=job.id))
     return render_template('index.html')
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
+
 @app.route('/results')
 def results_page():
-    global consolidated_data
-    table = "<p>No transaction data to display. Please upload your PDF statements.</p>"
     monthly_summary = ""
     categories = sorted(list(set(KEYWORDS_TO_CATEGORY.values())))
-    if not consolidated_data.empty:
-        display_df = consolidated_data.copy()
-        display_df['Date'] = display_df['Date'].dt.strftime('%Y-%m-%d')
-        cols = ['Date', 'Description', 'Amount', 'Category', 'Source']
-        display_df['Amount'] = display_df['Amount'].map('{:,.2f}'.format)
-        table = display_df[cols].to_html(classes='table table-striped table-hover', index=False, justify='left')
-        summary_df = consolidated_data.copy()
-        summary_df['Month'] = summary_df['Date'].dt.strftime('%Y-%m')
-        pivot_table = pd.pivot_table(summary_df, values='Amount', index='Month', columns='Category', aggfunc='sum', fill_value=0)
-        pivot_table['Total'] = pivot_table.sum(axis=1)
-        pivot_table.sort_index(ascending=False, inplace=True)
+    # The transaction table itself is loaded page by page from /api/transactions.
+    if not store.is_empty():
+        # Precomputed month x category totals; no pass over the transactions.
+        pivot_table = store.monthly_summary()
         for col in pivot_table.columns:
             pivot_table[col] = pivot_table[col].map('{:,.2f}'.format)
         monthly_summary = pivot_table.to_html(classes='table table-hover', justify='left')
-    return render_template('results.html', table=table, monthly_summary=monthly_summary, categories=categories)
+    job = job_queue.get(request.args.get('job', ''))
+    return render_template('results.html', monthly_summary=monthly_summary, categories=categories,
+                           job=job.to_dict() if job else None, show_timings=request.args.get('timings') == '1',
+                           duplicates=store.flagged_duplicates())
+
+@app.route('/duplicates/<int:transaction_id>/<action>', methods=['POST'])
+def resolve_duplicate(transaction_id, action):
+    if action not in ('merge', 'keep'):
+        abort(404)
+    if store.resolve_duplicate(transaction_id, merge=action == 'merge'):
+        flash('Duplicate removed.' if action == 'merge' else 'Kept both transactions.', 'info')
+    else:
+        flash('That transaction is no longer flagged as a duplicate.', 'warning')
+    return redirect(url_for('results_page'))
+
+def transaction_filters(args):
+    # Shared by the transactions API and exports. Raises ValueError on bad input.
+    filters = {}
+    for key in ('date_from', 'date_to'):
+        if args.get(key):
+            filters[key] = datetime.strptime(args[key], '%Y-%m-%d').strftime('%Y-%m-%d')
+    for key in ('min_amount', 'max_amount'):
+        if args.get(key):
+            filters[key] = float(args[key])
+    for key in ('category', 'source', 'search'):
+        if args.get(key):
+            filters[key] = args[key]
+    return filters
+
+@app.route('/api/transactions')
+def api_transactions():
+    try:
+        filters = transaction_filters(request.args)
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+        sort = request.args.get('sort', 'date')
+        descending = request.args.get('order', 'desc') != 'asc'
+        rows, next_cursor = store.page(filters, sort, descending, limit, request.args.get('cursor'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'rows': rows, 'next_cursor': next_cursor})
 
 @app.route('/plot.png')
 def plot_png():
-    global consolidated_data
-    if consolidated_data.empty:
-        return Response(status=204)
-    fig, ax = plt.subplots(figsize=(10, 7))
-    spending_by_category = consolidated_data.groupby('Category')['Amount'].mean().sort_values()
-    spending_by_category.plot(kind='barh', ax=ax, color='lightcoral')
-    ax.set_title('Average Spending by Category')
-    ax.set_xlabel('Average Transaction Amount (PHP)')
-    ax.set_ylabel('Category')
-    plt.tight_layout()
-    output = io.BytesIO()
-    plt.savefig(output, format='png')
-    plt.close(fig)
-    output.seek(0)
-    return Response(output.getvalue(), mimetype='image/png')
+    return chart('category', 'png')
+
+@app.route('/charts/<name>.<fmt>')
+def chart(name, fmt):
+    try:
+        etag = charts.etag(name, fmt)
+        # The browser already has this version; answer before drawing anything.
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            etag, body = charts.get(name, fmt, etag)
+            if body is None:
+                return Response(status=204)
+            response = Response(body, mimetype=CHART_FORMATS[fmt])
+    except KeyError:
+        abort(404)
+    response.set_etag(etag)
+    # Always revalidate; the ETag makes that a cheap 304.
+    response.cache_control.no_cache = True
+    return response
 
 @app.route('/export/<file_format>')
 def export_file(file_format):
-    global consolidated_data
-    if consolidated_data.empty:
+    if store.is_empty():
         flash('No data to export.', 'warning')
         return redirect(url_for('results_page'))
+    try:
+        # Same filters as /api/transactions, so a filtered view can be exported as-is.
+        filters = transaction_filters(request.args)
+    except ValueError as e:
+        flash(f'Invalid export filter: {e}', 'danger')
+        return redirect(url_for('results_page'))
+    batches = store.iter_batches(filters)
     if file_format == 'csv':
         return Response(
-            consolidated_data.to_csv(index=False),
+            stream_with_context(csv_chunks(batches)),
             mimetype="text/csv",
             headers={"Content-disposition": "attachment; filename=expenses.csv"}
         )
     elif file_format == 'excel':
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            consolidated_data.to_excel(writer, index=False, sheet_name='Expenses')
-        output.seek(0)
-        return Response(
-            output,
-            mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-disposition": "attachment; filename=expenses.xlsx"}
+        return file_response(
+            file_export(write_xlsx, batches, '.xlsx'),
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            "expenses.xlsx"
         )
+    elif file_format == 'parquet':
+        try:
+            path = file_export(write_parquet, batches, '.parquet')
+        except ImportError:
+            flash('Parquet export needs the pyarrow package to be installed.', 'warning')
+            return redirect(url_for('results_page'))
+        return file_response(path, "application/vnd.apache.parquet", "expenses.parquet")
     return redirect(url_for('results_page'))
 
+def file_response(path, mimetype, filename):
+    # Streams a temp export file; it's removed when the response is closed,
+    # whether or not the body was ever read.
+    response = Response(
+        file_chunks(path),
+        mimetype=mimetype,
+        headers={"Content-disposition": f"attachment; filename={filename}"}
+    )
+    response.call_on_close(lambda: os.remove(path))
+    return response
+
 @app.route('/add_entry', methods=['POST'])
 def add_entry():
-    global consolidated_data
     try:
         date = datetime.strptime(request.form['date'], '%Y-%m-%d')
         description = request.form['description']
         amount = float(request.form['amount'])
+        if not math.isfinite(amount):
+            raise ValueError(f"amount must be a number, not {request.form['amount']!r}")
         category = request.form['category']
         new_entry = pd.DataFrame([[date, description, amount, category, 'Manual Entry']], 
                                  columns=['Date', 'Description', 'Amount', 'Category', 'Source'])
-        consolidated_data = pd.concat([consolidated_data, new_entry], ignore_index=True)
-        consolidated_data = consolidated_data.sort_values(by='Date', ascending=False)
-        flash('Manual entry added successfully!', 'success')
+        if store.add(new_entry):
+            flash('Manual entry added successfully!', 'success')
+        else:
+            flash('Manual entry not added: the same transaction is already recorded.', 'warning')
     except (ValueError, KeyError) as e:
         flash(f'Error adding manual entry: {e}', 'danger')
     return redirect(url_for('results_page'))
 
 @app.route('/clear', methods=['POST'])
 def clear_data():
-    global consolidated_data
-    consolidated_data = pd.DataFrame()
+    store.clear()
     flash('All data has been cleared.', 'info')
     return redirect(url_for('results_page'))
 
@@ -0,0 +1,69 @@
+import random
+import string
+import sys
+import time
+from categorizer import Categorizer
+
+# --- Keyword loop vs. compiled automaton on a large synthetic rule set. ---
+# Usage: python bench_categorize.py [rules] [descriptions]   (default: 10000 100000)
+# The old per-row keyword loop is too slow to run on everything, so it is timed
+# on a sample and extrapolated.
+
+n_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+n_descriptions = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+LOOP_SAMPLE = 200
+
+random.seed(42)
+
+
+def random_word(low, high):
+    return ''.join(random.choice(string.ascii_lowercase) for _ in range(random.randint(low, high)))
+
+
+keywords = {}
+while len(keywords) < n_rules:
+    keywords[random_word(4, 10)] = random.choice(["Food", "Transport", "Shopping", "Travel", "Utilities"])
+keyword_list = list(keywords)
+
+# Merchant-like descriptions: a few thousand distinct merchants, some of them
+# containing a keyword, repeated the way real statements repeat them.
+merchants = []
+for _ in range(5000):
+    words = [random_word(3, 8).title() for _ in range(random.randint(2, 4))]
+    if random.random() < 0.5:
+        words.insert(random.randrange(len(words) + 1), random.choice(keyword_list).upper())
+    merchants.append(' '.join(words))
+descriptions = [random.choice(merchants) for _ in range(n_descriptions)]
+
+
+def loop_categorize(description):
+    desc_lower = description.lower()
+    for keyword, cat in keywords.items():
+        if keyword in desc_lower:
+            return cat
+    return "Uncategorized"
+
+
+print(f"--- Categorizer benchmark: {n_rules} rules x {n_descriptions} descriptions ---")
+
+start = time.perf_counter()
+loop_result = [loop_categorize(d) for d in descriptions[:LOOP_SAMPLE]]
+loop_time = (time.perf_counter() - start) * n_descriptions / LOOP_SAMPLE
+print(f"Keyword loop:  ~{loop_time:.1f}s (extrapolated from {LOOP_SAMPLE} rows)")
+
+start = time.perf_counter()
+categorizer = Categorizer.from_keywords(keywords)
+build_time = time.perf_counter() - start
+print(f"Compile:       {build_time:.2f}s")
+
+start = time.perf_counter()
+result = [categorizer.categorize(d) for d in descriptions]
+scan_time = time.perf_counter() - start
+print(f"Automaton:     {scan_time:.2f}s ({n_descriptions / scan_time:,.0f} rows/sec)")
+
+start = time.perf_counter()
+batch_result = categorizer.categorize_many(descriptions)
+batch_time = time.perf_counter() - start
+print(f"Batch:         {batch_time:.2f}s ({n_descriptions / batch_time:,.0f} rows/sec)")
+
+print("Same categories as the loop:", result[:LOOP_SAMPLE] == loop_result and batch_result == result)
@@ -0,0 +1,65 @@
+import os
+import random
+import sys
+import tempfile
+import time
+import pandas as pd
+from duplicates import DuplicateMatcher
+from store import TransactionStore
+from synthetic import STATEMENT_ROWS as BATCH, fill_history, history_batch
+
+# --- Near-duplicate checking cost as transaction history grows. ---
+# Usage: python bench_duplicates.py [max_rows]   (default: 200000)
+# For each history size synthetic.fill_history reaches, adds one more
+# statement of which a third re-appears from an earlier one with its
+# description slightly garbled and its date shifted. Times the insert with
+# the duplicate check against a plain insert, and counts what was caught.
+
+max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+random.seed(11)
+
+
+def garble(description):
+    i = random.randrange(len(description))
+    return description[:i] + random.choice('lI1O0') + description[i + 1:]
+
+
+def incoming_statement(store, name):
+    # A third copied from the history (OCR-ish noise, posted a day later), the rest new.
+    copies = store.to_frame().sample(BATCH // 3, random_state=random.randrange(1 << 30))
+    copies['Description'] = copies['Description'].map(garble)
+    copies['Date'] = copies['Date'] + pd.Timedelta(days=1)
+    fresh = history_batch(BATCH - len(copies), 10 ** 9, random)
+    df = pd.concat([copies, fresh], ignore_index=True)
+    df['Source'] = name
+    return df
+
+
+def remove(store, incoming):
+    # Back to just the history, so every step measures the same kind of insert.
+    with store.connect() as conn:
+        conn.execute("DELETE FROM transactions WHERE source = ?", (incoming['Source'][0],))
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        plain = TransactionStore(path)
+        checked = TransactionStore(path, duplicates=DuplicateMatcher('flag'))
+        print("--- Insert cost vs. history size (1000-row statement, 1/3 near-duplicates) ---")
+        print(f"{'rows':>8} {'plain (us/row)':>15} {'checked (us/row)':>17} {'flagged':>8}")
+        for size in fill_history(plain, max_rows, seed=11):
+            incoming = incoming_statement(plain, f"incoming-{size}.pdf")
+
+            start = time.perf_counter()
+            plain.add(incoming)
+            plain_time = time.perf_counter() - start
+            remove(plain, incoming)
+
+            start = time.perf_counter()
+            checked.add(incoming)
+            checked_time = time.perf_counter() - start
+            flagged = checked.duplicate_count()
+            remove(checked, incoming)
+            print(f"{size:8} {plain_time / BATCH * 1e6:15.1f} {checked_time / BATCH * 1e6:17.1f} {flagged:5}/{BATCH // 3}")
@@ -0,0 +1,39 @@
+import glob
+import os
+import sys
+import time
+from extraction import BACKENDS, TEXT
+
+# --- Pages/sec for each text extraction backend over a folder of statements. ---
+# Usage: python bench_extract.py [folder]   (default: uploads)
+# Only text extraction and page classification are timed; scan pages are
+# counted but not OCR'd, so this runs without Tesseract.
+
+folder = sys.argv[1] if len(sys.argv) > 1 else "uploads"
+filepaths = sorted(glob.glob(os.path.join(folder, "*.pdf")))
+if not filepaths:
+    print(f"Error: No PDF files found in '{folder}'")
+    sys.exit(1)
+
+print(f"--- Extraction benchmark: {len(filepaths)} files in {folder} ---")
+for name, backend in BACKENDS.items():
+    pages = text_pages = chars = skipped = 0
+    start = time.perf_counter()
+    for filepath in filepaths:
+        try:
+            doc = backend(filepath)
+        except Exception:
+            skipped += 1  # encrypted or unreadable with this backend
+            continue
+        try:
+            for i in range(doc.page_count):
+                kind, text = doc.read_page(i)
+                pages += 1
+                if kind == TEXT:
+                    text_pages += 1
+                    chars += len(text)
+        finally:
+            doc.close()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>10}: {pages} pages ({text_pages} with text, {chars} chars) in {elapsed:.2f}s "
+          f"= {pages / elapsed:.1f} pages/sec, {skipped} file(s) skipped")
@@ -0,0 +1,111 @@
+import re
+import sys
+import time
+from datetime import datetime
+import pandas as pd
+import synthetic
+from bench_parsers import output_digest
+from statement_parser import (DATE_FORMATS, OCR_AMOUNT_PATTERN, OCR_DATE_PATTERN, TEXT_LINE_PATTERN, categorizer,
+                              parse_ocr_lines, parse_text_lines)
+
+# --- Line-by-line vs. whole-column parsing of large synthetic statements. ---
+# Usage: python bench_line_parsers.py [transactions ...]   (default: 10000 100000 300000)
+# Runs the parsers as they were (a Python loop over the lines, strptime per
+# date, a dict per row) and the vectorized ones over the same statement text,
+# in both layouts, and checks they extract the same rows.
+
+sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000, 300000]
+
+
+def flexible_date_parser(date_str, year):
+    date_str = re.sub(r',', '', date_str).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            if len(date_str.split()) < 3:
+                return datetime.strptime(f"{date_str} {year}", fmt)
+            else:
+                return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def categorize(expenses):
+    if not expenses.empty:
+        expenses['Category'] = categorizer.categorize_many(expenses['Description'])
+    return expenses
+
+
+def statement_year(full_text):
+    year_match = re.search(r'\b(20\d{2})\b', full_text)
+    return int(year_match.group(1)) if year_match else datetime.now().year
+
+
+def loop_text_lines(full_text, filename):
+    expenses = []
+    year = statement_year(full_text)
+    for line in full_text.split('\n'):
+        match = TEXT_LINE_PATTERN.search(line.strip())
+        if match:
+            date_to_parse, description, amount_str = match.groups()
+            date = flexible_date_parser(date_to_parse, year)
+            if date and float(amount_str.replace(",", "")) >= 0:
+                expenses.append({"Date": date, "Description": description, "Amount": float(amount_str.replace(",", "")),
+                                 "Category": None, "Source": filename})
+    return categorize(pd.DataFrame(expenses))
+
+
+def loop_ocr_lines(full_text, filename):
+    expenses = []
+    year = statement_year(full_text)
+    current = None
+
+    def finish(transaction):
+        transaction['Description'] = re.sub(r'\s+', ' ', transaction['Description']).strip()
+        if not any(word in transaction['Description'] for word in ("Interest", "Charge", "Fee")):
+            expenses.append(transaction)
+
+    for line in full_text.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        date_match = OCR_DATE_PATTERN.search(line)
+        amount_match = OCR_AMOUNT_PATTERN.search(line)
+        if date_match:
+            if current:
+                finish(current)
+            current = {'Date': flexible_date_parser(date_match.group(1), year), 'Description': '', 'Amount': None,
+                       'Source': filename}
+            rest = OCR_DATE_PATTERN.sub('', line).strip()
+            if rest:
+                current['Description'] += rest + ' '
+        elif amount_match and current:
+            amount = float(amount_match.group(1).replace(",", ""))
+            rest = OCR_AMOUNT_PATTERN.sub('', line).strip()
+            if rest:
+                current['Description'] += rest
+            if amount >= 0:
+                current['Amount'] = amount
+        elif current:
+            current['Description'] += line + ' '
+    if current and current['Amount'] is not None:
+        finish(current)
+    return categorize(pd.DataFrame(expenses))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+print("--- Line parsing: loop vs. vectorized ---")
+print(f"{'layout':<8} {'transactions':>12} {'loop rows/s':>12} {'vector rows/s':>14} {'speedup':>8}  same rows")
+for layout, loop, vectorized in (('text', loop_text_lines, parse_text_lines), ('scanned', loop_ocr_lines, parse_ocr_lines)):
+    for size in sizes:
+        text = synthetic.statement_text(size, seed=size, scanned=layout == 'scanned')
+        loop_time, before = timed(loop, text, 'synthetic.pdf')
+        vector_time, after = timed(vectorized, text, 'synthetic.pdf')
+        same = output_digest(before) == output_digest(after)
+        print(f"{layout:<8} {size:12,} {len(before) / loop_time:12,.0f} {len(after) / vector_time:14,.0f} "
+              f"{loop_time / vector_time:7.1f}x  {same}")
@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+from ocr_engine import OCREngine
+
+# --- Compares serial vs. page-parallel OCR wall time on one statement. ---
+# Usage: python bench_ocr.py ["UB March Statement.pdf"] [workers]
+# Set TESSERACT_CMD if tesseract is not on your PATH.
+
+if __name__ == "__main__":
+    filepath = sys.argv[1] if len(sys.argv) > 1 else "UB March Statement.pdf"
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else min(4, os.cpu_count() or 1)
+
+    if not os.path.exists(filepath):
+        print(f"Error: File not found at '{filepath}'")
+        sys.exit(1)
+
+    engine = OCREngine(max_workers=workers, tesseract_cmd=os.environ.get("TESSERACT_CMD"))
+    print(f"--- OCR benchmark: {filepath} ({workers} workers) ---")
+
+    start = time.perf_counter()
+    serial_pages = engine.ocr_pages_serial(filepath)
+    serial_time = time.perf_counter() - start
+    print(f"Serial:   {len(serial_pages)} pages in {serial_time:.2f}s")
+
+    # Warm the pool first so process start-up isn't billed to the parallel run.
+    engine._get_pool()
+    start = time.perf_counter()
+    parallel_pages = engine.ocr_pages(filepath)
+    parallel_time = time.perf_counter() - start
+    print(f"Parallel: {len(parallel_pages)} pages in {parallel_time:.2f}s")
+    engine.shutdown()
+
+    print(f"Speed-up: {serial_time / parallel_time:.2f}x")
+    print("Output identical:", serial_pages == parallel_pages)
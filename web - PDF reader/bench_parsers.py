@@ -0,0 +1,254 @@
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from extraction import OCR, open_document
+from parse_cache import file_digest
+from store import frame_rows
+import synthetic
+
+# --- Parser benchmark and regression check over the sample statements. ---
+# Usage: python bench_parsers.py                   (compare with bench_baseline.json)
+#        python bench_parsers.py --save-baseline   (record a new baseline)
+#        python bench_parsers.py --synthetic 100,400 --scans 20
+#
+# Every (parser path, statement) pair runs in a fresh process, so the peak RSS
+# is that run's alone, and reports wall time (best of --repeat), pages/sec and
+# a digest of the transactions it extracted. A run fails (exit status 1) if
+# any output differs from the baseline, if a case got slower than the
+# baseline by more than --tolerance, or if a parser that can read a synthetic
+# statement didn't find every transaction generated into it (checked before
+# a baseline is saved, too). Timings only mean something against a
+# baseline recorded on the same machine; the output digests hold anywhere.
+#
+# Paths:
+#   pipeline - StatementParser as the app runs it (no parse cache)
+#   text     - parse_text_based_pdf, the original pdfplumber text path
+#   ocr      - every page through Tesseract and the UnionBank line parser,
+#              whatever its text layer; only for statements with scanned
+#              pages, and only if tesseract can be found.
+#
+# Besides the samples (UB March Statement.pdf and uploads/, byte-identical
+# copies counted once), synthetic statements of the given page counts are
+# generated: text ones for every path, scanned ones for the OCR paths.
+
+BASELINE = 'bench_baseline.json'
+PATHS = ('pipeline', 'text', 'ocr')
+# Fast cases are repeated up to --repeat times, but only within this budget.
+REPEAT_BUDGET = 5.0
+
+
+def output_digest(df):
+    rows = [] if df.empty else [(d, desc, round(amount, 2), cat, src) for d, desc, amount, cat, src in frame_rows(df)]
+    return hashlib.sha256(json.dumps(rows).encode('utf-8')).hexdigest()[:16]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil  # Windows
+            return psutil.Process().memory_info().peak_wset / 2 ** 20
+        except (ImportError, AttributeError):
+            return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2 ** 20 if sys.platform == 'darwin' else rss / 1024
+
+
+def run_case(path, filepath, repeat, tesseract_cmd):
+    from ocr_engine import OCREngine, page_count
+    from statement_parser import StatementParser, parse_ocr_lines, parse_text_based_pdf
+
+    filename = os.path.basename(filepath)
+    engine = OCREngine(max_workers=1, tesseract_cmd=tesseract_cmd)
+
+    def quiet(message, category='info'):
+        pass
+
+    parse = {
+        'pipeline': lambda: StatementParser(engine).parse_uncached(filepath, filename, quiet),
+        'text': lambda: parse_text_based_pdf(filepath, filename, quiet),
+        'ocr': lambda: parse_ocr_lines(engine.ocr_text(filepath), filename),
+    }[path]
+
+    runs, total = [], 0.0
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        while not runs or (len(runs) < repeat and total < REPEAT_BUDGET):
+            start = time.perf_counter()
+            df = parse()
+            runs.append(time.perf_counter() - start)
+            total += runs[-1]
+    try:
+        pages = page_count(filepath)
+    except ValueError:
+        pages = 0
+    seconds = min(runs)
+    return {
+        'seconds': round(seconds, 4),
+        'pages': pages,
+        'pages_per_sec': round(pages / seconds, 1) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb() or 0, 1) or None,
+        'transactions': len(df),
+        'digest': output_digest(df),
+    }
+
+
+def run_isolated(*args):
+    # A fresh interpreter per case; forked children would inherit our RSS.
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(run_case, *args).result()
+
+
+def has_scanned_pages(filepath):
+    try:
+        doc = open_document(filepath)
+    except Exception:
+        return False
+    try:
+        return any(doc.read_page(i)[0] == OCR for i in range(doc.page_count))
+    finally:
+        doc.close()
+
+
+def sample_corpus():
+    # (name, filepath, transactions generated) triples; None for real statements.
+    seen, corpus = set(), []
+    for filepath in ['UB March Statement.pdf'] + sorted(glob.glob(os.path.join('uploads', '*.pdf'))):
+        if not os.path.exists(filepath):
+            continue
+        digest = file_digest(filepath)
+        if digest not in seen:
+            seen.add(digest)
+            corpus.append((filepath.replace(os.sep, '/'), filepath, None))
+    return corpus
+
+
+def synthetic_corpus(folder, text_pages, scan_pages):
+    corpus = []
+    for pages in text_pages:
+        filepath = os.path.join(folder, f"text-{pages}p.pdf")
+        generated = synthetic.make_text_statement(filepath, pages, seed=pages)
+        corpus.append((f"synthetic/text-{pages}p.pdf", filepath, generated))
+    for pages in scan_pages:
+        filepath = os.path.join(folder, f"scan-{pages}p.pdf")
+        generated = synthetic.make_scanned_statement(filepath, pages, seed=pages)
+        corpus.append((f"synthetic/scan-{pages}p.pdf", filepath, generated))
+    return corpus
+
+
+def compare(results, baseline, tolerance, min_delta):
+    # Returns {key: status}; anything but 'ok' / 'new' is a failure.
+    statuses = {}
+    for key, r in results.items():
+        b = baseline.get(key)
+        if b is None:
+            statuses[key] = 'new'
+        elif r['digest'] != b['digest'] or r['transactions'] != b['transactions']:
+            statuses[key] = f"OUTPUT CHANGED ({b['transactions']} -> {r['transactions']} transactions)"
+        elif r['seconds'] > b['seconds'] * (1 + tolerance) and r['seconds'] - b['seconds'] > min_delta:
+            statuses[key] = f"SLOWER ({b['seconds']:.3f}s -> {r['seconds']:.3f}s)"
+        else:
+            statuses[key] = 'ok'
+    return statuses
+
+
+def check_generated(results, generated):
+    # {key: status} for the synthetic cases that missed (or invented) transactions.
+    return {
+        key: f"FOUND {results[key]['transactions']} OF {count} GENERATED TRANSACTIONS"
+        for key, count in generated.items()
+        if results[key]['transactions'] != count
+    }
+
+
+def int_list(value):
+    return [int(v) for v in value.split(',') if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the statement parsers and check for regressions.")
+    parser.add_argument('--paths', default=','.join(PATHS), help="comma-separated subset of " + ', '.join(PATHS))
+    parser.add_argument('--synthetic', type=int_list, default=[100, 400], help="text statement page counts")
+    parser.add_argument('--scans', type=int_list, default=[10], help="scanned statement page counts (OCR paths)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument('--min-delta', type=float, default=0.05, help="ignore slowdowns smaller than this (s)")
+    parser.add_argument('--no-isolate', action='store_true', help="run in this process (no peak RSS)")
+    parser.add_argument('--tesseract', default=os.environ.get('TESSERACT_CMD'))
+    args = parser.parse_args(argv)
+
+    paths = [p for p in args.paths.split(',') if p]
+    ocr_available = shutil.which(args.tesseract or 'tesseract') is not None
+    if 'ocr' in paths and not ocr_available:
+        print("tesseract not found; skipping the OCR cases (set TESSERACT_CMD or --tesseract).")
+
+    workdir = tempfile.mkdtemp(prefix='bench_parsers_')
+    try:
+        corpus = sample_corpus() + synthetic_corpus(workdir, args.synthetic, args.scans if ocr_available else [])
+        results, generated = {}, {}
+        print(f"{'case':<62} {'seconds':>8} {'pages/s':>8} {'RSS MB':>7} {'txns':>6}")
+        for name, filepath, count in corpus:
+            scanned = has_scanned_pages(filepath)
+            for path in paths:
+                if scanned and not ocr_available and path == 'pipeline':
+                    continue  # would only measure the OCR failure
+                if path == 'ocr' and not (scanned and ocr_available):
+                    continue
+                case_args = (path, filepath, args.repeat, args.tesseract)
+                r = run_case(*case_args) if args.no_isolate else run_isolated(*case_args)
+                if args.no_isolate:
+                    r['peak_rss_mb'] = None
+                key = f"{path}:{name}"
+                results[key] = r
+                # The text path can't read a scan, so there's nothing to hold it to.
+                if count is not None and not (scanned and path == 'text'):
+                    generated[key] = count
+                rss = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] else '-'
+                print(f"{key:<62} {r['seconds']:8.3f} {r['pages_per_sec'] or 0:8.1f} {rss:>7} {r['transactions']:6}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    missed = check_generated(results, generated)
+    if args.save_baseline:
+        if missed:
+            print("Not saving a baseline; some synthetic statements weren't fully parsed:")
+            for key, status in missed.items():
+                print(f"  {key}: {status}")
+            return 1
+        with open(args.baseline, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.platform(), 'results': results},
+                      f, indent=1, sort_keys=True)
+            f.write('\n')
+        print(f"Saved {len(results)} case(s) to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    statuses = compare(results, baseline, args.tolerance, args.min_delta)
+    statuses.update(missed)
+    failures = {key: status for key, status in statuses.items() if status not in ('ok', 'new')}
+    print(f"--- {len(statuses) - len(failures)} ok, {len(failures)} failed against {args.baseline} ---")
+    for key, status in statuses.items():
+        if status != 'ok':
+            print(f"  {key}: {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
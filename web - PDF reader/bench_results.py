@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+from store import TransactionStore
+from synthetic import fill_history
+
+# --- Results-page summary latency as transaction history grows. ---
+# Usage: python bench_results.py [max_rows]   (default: 200000)
+# For each history size synthetic.fill_history reaches, times the old
+# pivot-from-all-rows summary against the maintained aggregates, and checks
+# both produce the same table.
+
+max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+
+def pivot_from_rows(store):
+    # What results_page and plot_png used to do on every request.
+    df = store.to_frame()
+    df['Month'] = df['Date'].dt.strftime('%Y-%m')
+    pivot = pd.pivot_table(df, values='Amount', index='Month', columns='Category', aggfunc='sum', fill_value=0)
+    pivot['Total'] = pivot.sum(axis=1)
+    means = df.groupby('Category')['Amount'].mean()
+    return pivot.sort_index(ascending=False), means
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        store = TransactionStore(os.path.join(tmp, "bench.db"))
+        print("--- Summary latency vs. history size ---")
+        print(f"{'rows':>8} {'pivot (ms)':>11} {'aggregates (ms)':>16}  consistent")
+        for rows in fill_history(store, max_rows, seed=7):
+            old_time, (old_pivot, old_means) = timed(lambda: pivot_from_rows(store), repeat=2)
+            new_time, (new_pivot, new_means) = timed(lambda: (store.monthly_summary(), store.category_means()))
+            same = (
+                not store.check_aggregates()
+                and ((old_pivot - new_pivot[old_pivot.columns]).abs().max().max() < 0.01)
+                and ((old_means - new_means[old_means.index]).abs().max() < 0.01)
+            )
+            print(f"{rows:>8} {old_time * 1000:>11.1f} {new_time * 1000:>16.1f}  {same}")
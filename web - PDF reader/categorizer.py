@@ -0,0 +1,91 @@
+from collections import deque, namedtuple
+
+# --- Keyword -> category matching compiled into one Aho-Corasick automaton ---
+# Instead of testing every keyword against every description, all keywords go
+# into a single trie with failure links, and a description is scanned once,
+# left to right, whatever the number of rules.
+#
+# When several rules match, the highest priority wins; ties go to the rule
+# listed first, which is exactly the old "first keyword in the dict" behaviour.
+
+UNCATEGORIZED = "Uncategorized"
+
+Rule = namedtuple('Rule', ['keyword', 'category', 'priority', 'whole_word'], defaults=[0, False])
+
+
+class Categorizer:
+    def __init__(self, rules, default=UNCATEGORIZED):
+        self.rules = [Rule(*rule) if not isinstance(rule, Rule) else rule for rule in rules]
+        self.default = default
+        # Smaller rank = better rule.
+        self._rank = [(-rule.priority, i) for i, rule in enumerate(self.rules)]
+        self._build()
+
+    @classmethod
+    def from_keywords(cls, keywords_to_category, default=UNCATEGORIZED):
+        return cls([Rule(keyword, category) for keyword, category in keywords_to_category.items()], default)
+
+    def _build(self):
+        goto, fail, out = [{}], [0], [[]]
+        for i, rule in enumerate(self.rules):
+            node = 0
+            for ch in rule.keyword.lower():
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    fail.append(0)
+                    out.append([])
+                node = nxt
+            out[node].append(i)
+
+        # Breadth-first, so a node's failure target is always finished first.
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        # Best rule first, so a node without word-boundary rules is decided by out[0].
+        self._goto, self._fail = goto, fail
+        self._out = [sorted(rules, key=self._rank.__getitem__) for rules in out]
+        self._lengths = [len(rule.keyword) for rule in self.rules]
+
+    def categorize(self, description):
+        text = description.lower()
+        goto, fail, out, rank = self._goto, self._fail, self._out, self._rank
+        best = None
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for i in out[node]:
+                if best is not None and rank[i] >= rank[best]:
+                    break
+                if self.rules[i].whole_word and not self._on_word_boundary(text, pos + 1 - self._lengths[i], pos + 1):
+                    continue
+                best = i
+                break
+        return self.rules[best].category if best is not None else self.default
+
+    @staticmethod
+    def _on_word_boundary(text, start, end):
+        return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+    def categorize_many(self, descriptions):
+        # Statements repeat the same merchants a lot; scan each distinct text once.
+        seen = {}
+        result = []
+        for description in descriptions:
+            category = seen.get(description)
+            if category is None:
+                category = seen[description] = self.categorize(description)
+            result.append(category)
+        return result
@@ -0,0 +1,108 @@
+import io
+import threading
+from collections import OrderedDict
+from matplotlib.figure import Figure
+
+# --- Chart rendering with a cache keyed by the store's data version ---
+# Charts are drawn with matplotlib's object API (no pyplot state machine, so
+# concurrent requests can't step on each other's figures) from the aggregate
+# tables, never from the raw transactions. The rendered bytes are kept per
+# (chart, format, data version): until a transaction is added or removed,
+# every request is served from memory and matplotlib isn't touched at all.
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+
+def render_category_means(store, ax):
+    spending_by_category = store.category_means().sort_values()
+    if spending_by_category.empty:
+        return False
+    spending_by_category.plot(kind='barh', ax=ax, color='lightcoral')
+    ax.set_title('Average Spending by Category')
+    ax.set_xlabel('Average Transaction Amount (PHP)')
+    ax.set_ylabel('Category')
+    return True
+
+
+def render_monthly_trend(store, ax):
+    totals = store.monthly_totals()
+    if totals.empty:
+        return False
+    by_month = totals.groupby('Month')['Amount'].sum().sort_index()
+    ax.plot(by_month.index, by_month.values, marker='o', color='steelblue')
+    ax.set_title('Total Spending by Month')
+    ax.set_xlabel('Month')
+    ax.set_ylabel('Total Amount (PHP)')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, alpha=0.3)
+    return True
+
+
+def render_source_totals(store, ax):
+    by_source = store.source_totals().sort_values()
+    if by_source.empty:
+        return False
+    by_source.plot(kind='barh', ax=ax, color='mediumseagreen')
+    ax.set_title('Total Spending by Statement')
+    ax.set_xlabel('Total Amount (PHP)')
+    ax.set_ylabel('Source')
+    return True
+
+
+CHARTS = {
+    'category': render_category_means,
+    'monthly': render_monthly_trend,
+    'sources': render_source_totals,
+}
+
+
+def render(store, name, fmt='png'):
+    # Returns the encoded chart, or None when there is nothing to plot.
+    fig = Figure(figsize=(10, 7))
+    ax = fig.add_subplot()
+    if not CHARTS[name](store, ax):
+        return None
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format=fmt)
+    return buf.getvalue()
+
+
+class ChartCache:
+    def __init__(self, store, max_entries=32):
+        self.store = store
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, name, fmt):
+        # Cheap: two indexed lookups, so a 304 can be answered before rendering.
+        # The database id keeps a recreated database's version 1 from matching
+        # a tag the browser kept from the old one.
+        if name not in CHARTS or fmt not in FORMATS:
+            raise KeyError(f"{name}.{fmt}")
+        return f'{name}-{fmt}-{self.store.database_id():x}-{self.store.data_version()}'
+
+    def get(self, name, fmt, etag=None):
+        # Returns (etag, bytes or None).
+        etag = etag or self.etag(name, fmt)
+        with self._lock:
+            if etag in self._entries:
+                self._entries.move_to_end(etag)
+                return etag, self._entries[etag]
+        body = render(self.store, name, fmt)
+        if self.etag(name, fmt) != etag:
+            # The data changed while drawing; don't file this under the old version.
+            return etag, body
+        with self._lock:
+            self._entries[etag] = body
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag, body
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,58 @@
+import re
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+# --- Near-duplicate transactions across statements ---
+# The store's unique index only rejects rows that are identical, source
+# included. The same purchase on two statements (a Maya SoA downloaded twice,
+# a scan OCR'd as "SHOPEE PH TAGULG") gets through it. So every new row is
+# compared with its block: rows from other statements with the same amount,
+# dated within window_days of it. The store pulls that block out of its
+# (amount, date) index, so an insert costs the size of its block, not of the
+# history. Descriptions are normalized and scored with difflib.
+#
+#   flag  - insert the row and record it as a possible duplicate, for review
+#   merge - keep the row that was there first and drop the new one
+
+FLAG, MERGE = 'flag', 'merge'
+MODES = (FLAG, MERGE)
+
+WINDOW_DAYS = 3
+THRESHOLD = 0.85
+
+
+def normalize_description(description):
+    # Case, punctuation and spacing don't count: "Netflix.Com" == "NETFLIX COM".
+    return ' '.join(re.findall(r'[a-z0-9]+', description.lower()))
+
+
+class DuplicateMatcher:
+    def __init__(self, mode=FLAG, window_days=WINDOW_DAYS, threshold=THRESHOLD):
+        if mode not in MODES:
+            raise ValueError(f"unknown duplicate mode {mode!r} (use {' or '.join(MODES)})")
+        self.mode = mode
+        self.window_days = window_days
+        self.threshold = threshold
+
+    def date_range(self, date):
+        # (first, last) YYYY-MM-DD of the block a row dated `date` falls in.
+        day = datetime.strptime(date, '%Y-%m-%d')
+        window = timedelta(days=self.window_days)
+        return (day - window).strftime('%Y-%m-%d'), (day + window).strftime('%Y-%m-%d')
+
+    def best_match(self, description, candidates):
+        # candidates: (id, description) rows of the block. Returns (id, score)
+        # of the most similar one at or above the threshold, or None.
+        normalized = normalize_description(description)
+        best = None
+        for candidate_id, candidate in candidates:
+            other = normalize_description(candidate)
+            matcher = SequenceMatcher(None, normalized, other, autojunk=False)
+            # The upper bounds are cheap; skip ratio() when they already fall short.
+            if normalized != other and (matcher.real_quick_ratio() < self.threshold
+                                        or matcher.quick_ratio() < self.threshold):
+                continue
+            score = 1.0 if normalized == other else matcher.ratio()
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (candidate_id, score)
+        return best
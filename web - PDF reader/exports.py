@@ -0,0 +1,82 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from openpyxl import Workbook
+from store import COLUMNS
+
+# --- Streaming exports ---
+# Rows come from TransactionStore.iter_batches, so memory stays flat however
+# long the history is. CSV is generated chunk by chunk straight into the
+# response; XLSX and Parquet are zip/columnar formats that can only be
+# finished at the end, so they are written to a temp file in constant memory
+# and then streamed from disk.
+
+CHUNK_SIZE = 64 * 1024
+
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx(batches, path):
+    # write_only workbooks stream rows to disk instead of building a cell tree.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Expenses')
+    ws.append(COLUMNS)
+    for batch in batches:
+        for date, description, amount, category, source in batch:
+            ws.append([datetime.strptime(date, '%Y-%m-%d'), description, amount, category, source])
+    wb.save(path)
+
+
+def write_parquet(batches, path):
+    # pyarrow is optional; only this export needs it.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = pa.schema([
+        ('Date', pa.date32()),
+        ('Description', pa.string()),
+        ('Amount', pa.float64()),
+        ('Category', pa.string()),
+        ('Source', pa.string()),
+    ])
+    with pq.ParquetWriter(path, schema) as writer:
+        for batch in batches:
+            dates, descriptions, amounts, categories, sources = zip(*batch)
+            writer.write_table(pa.table([
+                pa.array([datetime.strptime(d, '%Y-%m-%d').date() for d in dates], pa.date32()),
+                pa.array(descriptions, pa.string()),
+                pa.array(amounts, pa.float64()),
+                pa.array(categories, pa.string()),
+                pa.array(sources, pa.string()),
+            ], schema=schema))
+
+
+def file_export(write, batches, suffix):
+    # Runs write(batches, path) into a temp file and returns its path; the
+    # caller removes it once it has been sent (or not).
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        write(batches, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def file_chunks(path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            yield chunk
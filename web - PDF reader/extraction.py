@@ -0,0 +1,206 @@
+import fitz
+import pdfplumber
+from metrics import span
+from ocr_engine import page_count as ocr_page_count
+
+# --- Text extraction backends and per-page routing between text and OCR ---
+# A backend opens the document once and, page by page, decides whether the
+# page has a usable text layer, is a scan worth OCR'ing, or is blank; text
+# pages are read straight away. Only the scan pages are sent to Tesseract.
+#
+#   pymupdf    - MuPDF, the default. An order of magnitude faster than pdfminer
+#                and it sees the full page tree of the BPI statements.
+#   pdfplumber - pdfminer based, kept as the fallback.
+
+TEXT, OCR, BLANK = 'text', 'ocr', 'blank'
+
+# A page with fewer characters than this has no usable text layer.
+MIN_TEXT_CHARS = 20
+# Without a text layer, a page is worth OCR'ing if images cover this share of it
+# (a scan fills the page; BPI's image-only promo inserts sit around 0.65)...
+MIN_IMAGE_COVERAGE = 0.85
+# ...or if it has this many vector paths ("Print to PDF" output such as the
+# UnionBank statements draws every glyph as a path instead of text).
+MIN_VECTOR_PATHS = 50
+
+# Same tolerances pdfplumber's extract_text() uses to build words and lines.
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+# Characters only: skip image decoding, and let gaps (not MuPDF's guessed
+# spaces) decide where words break, so letter-spaced BPI text reads normally.
+RAWDICT_FLAGS = (fitz.TEXTFLAGS_RAWDICT | fitz.TEXT_INHIBIT_SPACES) & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def classify(text, image_coverage, vector_paths):
+    if len(text.strip()) >= MIN_TEXT_CHARS:
+        return TEXT
+    if image_coverage >= MIN_IMAGE_COVERAGE or vector_paths >= MIN_VECTOR_PATHS:
+        return OCR
+    return BLANK
+
+
+def join_chars(chars):
+    # chars: (top, x0, x1, c). Groups them into lines and words the way
+    # pdfplumber does, so the line regexes see the same text from either backend.
+    chars.sort()
+    lines, current, top = [], [], None
+    for char in chars:
+        if top is None or char[0] - top > Y_TOLERANCE:
+            if current:
+                lines.append(current)
+            current, top = [], char[0]
+        current.append(char)
+    if current:
+        lines.append(current)
+
+    out = []
+    for line in lines:
+        line.sort(key=lambda char: char[1])
+        parts, prev_x1, pending_space = [], None, False
+        for _, x0, x1, c in line:
+            if c.isspace():
+                pending_space = True
+                continue
+            if parts and (pending_space or x0 - prev_x1 > X_TOLERANCE):
+                parts.append(' ')
+            parts.append(c)
+            prev_x1, pending_space = x1, False
+        out.append(''.join(parts))
+    return '\n'.join(out)
+
+
+class PyMuPDFBackend:
+    name = 'pymupdf'
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.doc = fitz.open(filepath)
+        if self.doc.needs_pass:
+            self.doc.close()
+            raise ValueError("document closed or encrypted")
+
+    @property
+    def page_count(self):
+        return self.doc.page_count
+
+    @property
+    def metadata(self):
+        # Document info: 'producer', 'creator', 'title', ... ('' when missing).
+        return {key: value or '' for key, value in (self.doc.metadata or {}).items()}
+
+    def read_page(self, page_number):
+        page = self.doc[page_number]
+        chars = []
+        for block in page.get_text('rawdict', flags=RAWDICT_FLAGS)['blocks']:
+            for line in block.get('lines', ()):
+                for text_span in line['spans']:
+                    for ch in text_span['chars']:
+                        x0, y0, x1, _ = ch['bbox']
+                        chars.append((y0, x0, x1, ch['c']))
+        text = join_chars(chars)
+        kind = TEXT
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            page_area = abs(page.rect) or 1.0
+            covered = sum(abs(fitz.Rect(info['bbox']) & page.rect) for info in page.get_image_info())
+            kind = classify(text, min(covered / page_area, 1.0), len(page.get_cdrawings()))
+        return kind, text
+
+    def close(self):
+        self.doc.close()
+
+
+class PdfPlumberBackend:
+    name = 'pdfplumber'
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        try:
+            self.pdf = pdfplumber.open(filepath)
+            self.pages = self.pdf.pages
+        except pdfplumber.utils.exceptions.PdfminerException as e:
+            if "PDFPasswordIncorrect" in str(e):
+                raise ValueError("document closed or encrypted") from e
+            raise
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def metadata(self):
+        # Same lowercase keys as MuPDF's ('Producer' -> 'producer').
+        return {key.lower(): str(value) for key, value in (self.pdf.metadata or {}).items()}
+
+    def read_page(self, page_number):
+        page = self.pages[page_number]
+        text = page.extract_text() or ""
+        kind = TEXT
+        if len(text.strip()) < MIN_TEXT_CHARS:
+            page_area = (page.width * page.height) or 1.0
+            covered = sum((img['x1'] - img['x0']) * (img['bottom'] - img['top']) for img in page.images)
+            kind = classify(text, min(covered / page_area, 1.0),
+                            len(page.curves) + len(page.lines) + len(page.rects))
+        return kind, text
+
+    def close(self):
+        self.pdf.close()
+
+
+BACKENDS = {
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    PdfPlumberBackend.name: PdfPlumberBackend,
+}
+DEFAULT_BACKEND = PyMuPDFBackend.name
+
+
+def open_document(filepath, backend=DEFAULT_BACKEND):
+    # Try the configured backend first, then the others. A password-protected
+    # file is reported straight away, since no backend will do better.
+    names = [backend] + [name for name in BACKENDS if name != backend]
+    error = None
+    for name in names:
+        try:
+            return BACKENDS[name](filepath)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"The {name} backend could not open {filepath}: {e}")
+            error = error or e
+    raise error
+
+
+def iter_page_texts(doc, ocr_engine, first_page=None):
+    # Yields (kind, text) per page, in page order. Pages are classified first
+    # (which reads the text pages) so every scan page can be queued on the OCR
+    # pool at once; OCR text is then yielded as each page's result arrives.
+    # first_page is page 0's (kind, text) if the caller has already read it.
+    # Without an ocr_engine, scan pages are treated as blank.
+    kinds, texts = [], {}
+    with span('extract', pages=doc.page_count - (first_page is not None)) as s:
+        for i in range(doc.page_count):
+            kind, text = first_page if i == 0 and first_page is not None else doc.read_page(i)
+            kinds.append(kind)
+            if kind == TEXT:
+                texts[i] = text
+        s.nbytes = sum(len(text.encode('utf-8')) for text in texts.values())
+
+    ocr_pages = [i for i, kind in enumerate(kinds) if kind == OCR]
+    if ocr_pages and ocr_engine is None:
+        kinds = [BLANK if kind == OCR else kind for kind in kinds]
+        ocr_pages = []
+    if ocr_pages and doc.name != PyMuPDFBackend.name and ocr_page_count(doc.filepath) != doc.page_count:
+        # OCR rasterizes with MuPDF; if it numbers the pages differently we
+        # can't tell which page to render, so leave those pages out.
+        print(f"Skipping OCR for {doc.filepath}: {doc.name} and MuPDF disagree on the page count.")
+        kinds = [BLANK if kind == OCR else kind for kind in kinds]
+        ocr_pages = []
+    ocr_results = ocr_engine.iter_ocr_pages(doc.filepath, ocr_pages) if ocr_pages else iter(())
+
+    for i, kind in enumerate(kinds):
+        if kind == TEXT:
+            yield kind, texts.pop(i)
+        elif kind == OCR:
+            yield kind, next(ocr_results)
+        else:
+            yield kind, ''
@@ -0,0 +1,190 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from duplicates import MODES as DUPLICATE_MODES, DuplicateMatcher
+from exports import csv_chunks, write_parquet
+from extraction import BACKENDS, DEFAULT_BACKEND
+from metrics import span, tracing
+from ocr_engine import DEFAULT_DPI, OCREngine, page_count
+from parse_cache import ParseCache, file_digest
+from statement_parser import StatementParser
+from store import TransactionStore, frame_rows
+
+# --- Batch ingestion of whole statement folders, without the web app ---
+# Usage: python ingest.py uploads/                     (into transactions.db)
+#        python ingest.py statements/ -o 2025.parquet  (or .csv)
+#
+# Files are parsed on a process pool with the same StatementParser the
+# upload jobs use (and the same parse cache). Each worker runs its OCR
+# in-process, since the files themselves are already spread over the cores.
+# Files whose content hash is already in the store are skipped, as are
+# byte-identical copies within one run. Near-duplicates of rows from other
+# statements are flagged for review in the app (or merged, or let through:
+# --duplicates merge/off), as they are on upload. Set TESSERACT_CMD (or --tesseract)
+# if tesseract is not on your PATH.
+
+_parser = None
+
+
+def _init_worker(cache_folder, backend, dpi, tesseract_cmd):
+    global _parser
+    parse_cache = ParseCache(cache_folder) if cache_folder else None
+    ocr_engine = OCREngine(max_workers=1, dpi=dpi, tesseract_cmd=tesseract_cmd)
+    _parser = StatementParser(ocr_engine, parse_cache, backend)
+
+
+def parse_file(filepath, content_hash):
+    events = []
+
+    def report(message, category='info'):
+        events.append((category, message))
+
+    start = time.perf_counter()
+    result = {'filepath': filepath, 'content_hash': content_hash, 'pages': 0,
+              'frame': None, 'error': None, 'events': events}
+    try:
+        result['pages'] = page_count(filepath)
+    except Exception:
+        pass  # the parser reports encrypted/broken files itself
+    with tracing() as trace:
+        try:
+            result['frame'] = _parser.process(filepath, report, content_hash)
+        except Exception as e:
+            result['error'] = str(e)
+    result['timings'] = trace.summary()
+    if result['error'] is None and (result['frame'] is None or result['frame'].empty):
+        problems = [message for category, message in events if category in ('danger', 'warning')]
+        result['error'] = problems[-1] if problems else "no transactions found; the format might be unsupported"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def find_pdfs(directory):
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith('.pdf'):
+                yield os.path.join(root, name)
+
+
+def write_output(frames, path):
+    batches = (frame_rows(df) for df in frames)
+    if path.lower().endswith('.parquet'):
+        write_parquet(batches, path)
+    elif path.lower().endswith('.csv'):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for chunk in csv_chunks(batches):
+                f.write(chunk)
+    else:
+        raise ValueError(f"unsupported output format: {path} (use .parquet or .csv)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parse every statement PDF under a directory.")
+    parser.add_argument('directory')
+    parser.add_argument('-o', '--output', help="write a .parquet or .csv file instead of the store")
+    parser.add_argument('--db', default='transactions.db', help="store to ingest into (default: the app's)")
+    parser.add_argument('-w', '--workers', type=int, default=min(4, os.cpu_count() or 1))
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default=DEFAULT_BACKEND)
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--cache', default='parse_cache', help="parse cache folder, shared with the app")
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--force', action='store_true', help="re-parse files the store already has")
+    parser.add_argument('--duplicates', choices=DUPLICATE_MODES + ('off',), default='flag',
+                        help="what to do with near-duplicates of rows from other statements")
+    parser.add_argument('--tesseract', default=os.environ.get('TESSERACT_CMD'))
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        print(f"Error: '{args.directory}' is not a directory")
+        return 2
+
+    matcher = None if args.duplicates == 'off' else DuplicateMatcher(args.duplicates)
+    store = None if args.output else TransactionStore(args.db, duplicates=matcher)
+    already_ingested = store.ingested_hashes() if store and not args.force else set()
+    flagged_before = store.duplicate_count() if store else 0
+
+    start = time.perf_counter()
+    tasks, skipped, seen = [], 0, {}
+    for filepath in find_pdfs(args.directory):
+        content_hash = file_digest(filepath)
+        if content_hash in already_ingested:
+            skipped += 1
+        elif content_hash in seen:
+            print(f"Skipping {filepath}: same file as {seen[content_hash]}")
+            skipped += 1
+        else:
+            seen[content_hash] = filepath
+            tasks.append((filepath, content_hash))
+    print(f"{len(tasks)} file(s) to parse, {skipped} skipped, {args.workers} worker(s).")
+
+    initargs = (None if args.no_cache else args.cache, args.backend, args.dpi, args.tesseract)
+    frames, failures, pages, transactions, new_rows = [], [], 0, 0, 0
+    stages = {}
+
+    def add_timings(timings):
+        for stage, t in timings.items():
+            total = stages.setdefault(stage, {'seconds': 0.0, 'pages': 0, 'bytes': 0})
+            for key in total:
+                total[key] += t[key]
+
+    def collect(result):
+        nonlocal pages, transactions, new_rows
+        pages += result['pages']
+        add_timings(result['timings'])
+        name = os.path.relpath(result['filepath'], args.directory)
+        if result['error']:
+            failures.append((name, result['error']))
+            print(f"  FAILED {name}: {result['error']}")
+            return
+        df = result['frame']
+        transactions += len(df)
+        if store is not None:
+            # The same 'merge' stage the web app times, run here in the parent.
+            with tracing() as trace, span('merge', rows=len(df)):
+                added = store.add(df)
+                store.mark_ingested(result['content_hash'], os.path.basename(result['filepath']), added)
+            add_timings(trace.summary())
+            new_rows += added
+        else:
+            frames.append(df)
+        print(f"  {name}: {len(df)} transaction(s), {result['pages']} page(s) in {result['seconds']:.2f}s")
+
+    if args.workers <= 1 or len(tasks) <= 1:
+        _init_worker(*initargs)
+        for task in tasks:
+            collect(parse_file(*task))
+    elif tasks:
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=initargs) as pool:
+            futures = [pool.submit(parse_file, *task) for task in tasks]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    if args.output:
+        write_output(frames, args.output)
+        print(f"Wrote {transactions} transaction(s) to {args.output}")
+    else:
+        print(f"Added {new_rows} new transaction(s) to {args.db} ({transactions - new_rows} already there)")
+        flagged = store.duplicate_count() - flagged_before
+        if flagged:
+            print(f"Flagged {flagged} as possible duplicates of other statements' rows; review them in the app.")
+
+    elapsed = time.perf_counter() - start
+    parsed = len(tasks) - len(failures)
+    print(f"--- {parsed} parsed, {len(failures)} failed, {skipped} skipped in {elapsed:.2f}s ---")
+    if elapsed > 0:
+        print(f"Throughput: {len(tasks) / elapsed:.2f} files/sec, {pages / elapsed:.1f} pages/sec")
+    if stages:
+        # Summed over workers, so with -w > 1 this can exceed the wall time.
+        print(f"{'Stage':<10} {'seconds':>9} {'pages':>8} {'bytes':>12}")
+        for stage, t in stages.items():
+            print(f"{stage:<10} {t['seconds']:9.3f} {t['pages']:8} {t['bytes']:12,}")
+    for name, error in failures:
+        print(f"  {name}: {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
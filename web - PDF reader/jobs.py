@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from metrics import profiled, tracing
+
+# --- Background upload jobs ---
+# An upload becomes a Job holding one entry per file. Files are parsed on a
+# thread pool (the heavy OCR work already runs in its own process pool), and
+# everything a parser would have flashed is recorded as a per-file event so
+# it can be polled from /jobs/<id>. Each file also gets its per-stage timings
+# and, when asked for, a cProfile dump of its parse.
+#
+# Each file is an Upload: where it was saved, the name it was uploaded under
+# (which becomes the Source of its transactions) and the hash of its bytes,
+# taken when it was saved.
+
+Upload = namedtuple('Upload', 'path filename content_hash')
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class Job:
+    def __init__(self, uploads, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.created = time.time()
+        self.finished = None
+        self._lock = threading.Lock()
+        self.files = OrderedDict()
+        for upload in uploads:
+            self.files[upload.path] = {
+                'filename': upload.filename,
+                'status': QUEUED,
+                'seconds': None,
+                'transactions': 0,
+                'error': None,
+                'events': [],
+                'timings': {},
+                'profile': None,
+            }
+
+    def reporter(self, filepath):
+        # Same (message, category) shape as flash() so parsers don't care who listens.
+        def report(message, category='info'):
+            with self._lock:
+                self.files[filepath]['events'].append({'category': category, 'message': message})
+        return report
+
+    def last_problem(self, filepath):
+        # The last warning/danger a parser reported for the file, if any.
+        with self._lock:
+            problems = [e['message'] for e in self.files[filepath]['events'] if e['category'] in ('danger', 'warning')]
+        return problems[-1] if problems else None
+
+    def update(self, filepath, **fields):
+        with self._lock:
+            self.files[filepath].update(fields)
+            if all(f['status'] in (DONE, FAILED) for f in self.files.values()):
+                self.finished = time.time()
+
+    @property
+    def status(self):
+        statuses = {f['status'] for f in self.files.values()}
+        if self.finished is not None:
+            return FAILED if statuses == {FAILED} else DONE
+        return RUNNING if statuses - {QUEUED} else QUEUED
+
+    def to_dict(self):
+        with self._lock:
+            files = [dict(f, events=list(f['events'])) for f in self.files.values()]
+        return {
+            'id': self.id,
+            'status': self.status,
+            'created': self.created,
+            'finished': self.finished,
+            'files': files,
+        }
+
+
+class JobQueue:
+    def __init__(self, process_file, on_result, max_workers=2, max_jobs=50):
+        # process_file(upload, report) -> DataFrame; on_result(upload, df, report)
+        # merges it and returns how many rows were actually added.
+        self.process_file = process_file
+        self.on_result = on_result
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='parse')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, uploads, job_id=None, profile_folder=None):
+        # job_id lets the caller save the files under the job's id before submitting.
+        job = Job(uploads, job_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        for upload in uploads:
+            profile_path = None
+            if profile_folder:
+                profile_path = os.path.join(profile_folder, f"{job.id}-{os.path.basename(upload.path)}.prof")
+            self._executor.submit(self._run, job, upload, profile_path)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, upload, profile_path=None):
+        filepath, filename = upload.path, upload.filename
+        report = job.reporter(filepath)
+        job.update(filepath, status=RUNNING)
+        start = time.perf_counter()
+        with tracing() as trace, profiled(profile_path):
+            try:
+                new_data = self.process_file(upload, report)
+                if new_data is not None and not new_data.empty:
+                    added = self.on_result(upload, new_data, report)
+                    report(f'Successfully processed {filename}: {added} new transaction(s)', 'success')
+                    result = {'status': DONE, 'transactions': added}
+                else:
+                    # Say why, as ingest.parse_file does: the parser's own reason
+                    # (encrypted, no tesseract, unknown format) if it gave one.
+                    error = job.last_problem(filepath) or "no transactions found; the format might be unsupported"
+                    report(f'Could not extract any transactions from {filename}. The format might be unsupported.', 'danger')
+                    result = {'status': FAILED, 'error': error}
+            except Exception as e:
+                report(f'An unexpected error occurred while processing "{filename}": {e}', 'danger')
+                result = {'status': FAILED, 'error': str(e)}
+        job.update(filepath, seconds=round(time.perf_counter() - start, 3), timings=trace.summary(),
+                   profile=profile_path, **result)
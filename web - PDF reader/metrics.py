@@ -0,0 +1,159 @@
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+
+# --- Per-stage timing spans for the parse pipeline ---
+# Code marks a stage with `with span('parse', nbytes=...)`. Every finished
+# span goes into the process-wide METRICS registry (served as Prometheus text
+# on /metrics) and, if one is active on this thread, into a Trace, which is how
+# an upload job gets its own per-file breakdown.
+#
+# Spans record their own time only: a span nested in another (categorize
+# inside parse) is subtracted from its parent, so stage times add up to the
+# wall time instead of double counting. OCR pages are timed inside the worker
+# processes and reported back with record().
+
+STAGES = ('open', 'extract', 'rasterize', 'ocr', 'parse', 'categorize', 'merge')
+
+# Seconds; per call, so a single OCR page and a whole text extraction both fit.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_local = threading.local()
+
+
+class Metrics:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, pages=0, nbytes=0, rows=0):
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                s = self._stages[stage] = {'count': 0, 'seconds': 0.0, 'pages': 0, 'bytes': 0, 'rows': 0,
+                                           'buckets': [0] * len(self.buckets)}
+            s['count'] += 1
+            s['seconds'] += seconds
+            s['pages'] += pages
+            s['bytes'] += nbytes
+            s['rows'] += rows
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    s['buckets'][i] += 1
+
+    def render(self):
+        # Prometheus text exposition format, version 0.0.4.
+        with self._lock:
+            stages = {name: dict(s, buckets=list(s['buckets'])) for name, s in self._stages.items()}
+        order = sorted(stages, key=lambda name: (STAGES.index(name) if name in STAGES else len(STAGES), name))
+        lines = [
+            '# HELP ccpdf_stage_seconds Time spent in each stage of the statement parse pipeline.',
+            '# TYPE ccpdf_stage_seconds histogram',
+        ]
+        for name in order:
+            s = stages[name]
+            for bound, count in zip(self.buckets, s['buckets']):
+                lines.append(f'ccpdf_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'ccpdf_stage_seconds_bucket{{stage="{name}",le="+Inf"}} {s["count"]}')
+            lines.append(f'ccpdf_stage_seconds_sum{{stage="{name}"}} {s["seconds"]:.6f}')
+            lines.append(f'ccpdf_stage_seconds_count{{stage="{name}"}} {s["count"]}')
+        for key, help_text in (('pages', 'Pages handled'), ('bytes', 'Bytes handled'), ('rows', 'Transactions handled')):
+            lines.append(f'# HELP ccpdf_stage_{key}_total {help_text} by each stage.')
+            lines.append(f'# TYPE ccpdf_stage_{key}_total counter')
+            for name in order:
+                lines.append(f'ccpdf_stage_{key}_total{{stage="{name}"}} {stages[name][key]}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+
+METRICS = Metrics()
+
+
+class Trace:
+    # The spans of one unit of work (one uploaded file).
+    def __init__(self):
+        self.spans = []
+
+    def add(self, stage, seconds, pages=0, nbytes=0, rows=0):
+        self.spans.append((stage, seconds, pages, nbytes, rows))
+
+    def summary(self):
+        # {stage: {seconds, calls, pages, bytes, rows}}, in pipeline order.
+        totals = {}
+        for stage, seconds, pages, nbytes, rows in self.spans:
+            t = totals.setdefault(stage, {'seconds': 0.0, 'calls': 0, 'pages': 0, 'bytes': 0, 'rows': 0})
+            t['seconds'] += seconds
+            t['calls'] += 1
+            t['pages'] += pages
+            t['bytes'] += nbytes
+            t['rows'] += rows
+        for t in totals.values():
+            t['seconds'] = round(t['seconds'], 4)
+        order = sorted(totals, key=lambda name: STAGES.index(name) if name in STAGES else len(STAGES))
+        return {name: totals[name] for name in order}
+
+
+class Span:
+    def __init__(self, stage, pages=0, nbytes=0, rows=0):
+        self.stage = stage
+        self.pages = pages
+        self.nbytes = nbytes
+        self.rows = rows
+        self.children = 0.0
+
+
+def record(stage, seconds, pages=0, nbytes=0, rows=0):
+    # For time measured elsewhere (e.g. in an OCR worker process).
+    METRICS.observe(stage, seconds, pages, nbytes, rows)
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.add(stage, seconds, pages, nbytes, rows)
+
+
+@contextmanager
+def span(stage, pages=0, nbytes=0, rows=0):
+    # The yielded Span's pages/nbytes/rows can be filled in once they are known.
+    current = Span(stage, pages, nbytes, rows)
+    stack = _local.__dict__.setdefault('stack', [])
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        if stack:
+            stack[-1].children += elapsed
+        record(stage, max(elapsed - current.children, 0.0), current.pages, current.nbytes, current.rows)
+
+
+@contextmanager
+def tracing(trace=None):
+    # Collects this thread's spans into trace until the block ends.
+    trace = trace if trace is not None else Trace()
+    previous = getattr(_local, 'trace', None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def profiled(path):
+    # cProfile the block into path (a .prof file for pstats/snakeviz); no-op without a path.
+    if not path:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
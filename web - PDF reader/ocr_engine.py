@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import fitz
+import pytesseract
+from PIL import Image
+from metrics import record
+
+# --- Page-parallel OCR for image-based statements ---
+# Every page is rasterized and OCR'd on its own, so pages can run on separate
+# cores. Each worker opens the PDF itself and only ever holds one rendered page,
+# so peak memory is roughly max_workers x (one page at `dpi`).
+
+DEFAULT_DPI = 300
+
+
+def _init_worker(tesseract_cmd):
+    # Workers don't inherit runtime config on spawn-based platforms (Windows).
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def ocr_page_timed(filepath, page_number, dpi=DEFAULT_DPI):
+    # Returns (text, rasterize seconds, OCR seconds, raster bytes).
+    start = time.perf_counter()
+    with fitz.open(filepath) as doc:
+        pix = doc[page_number].get_pixmap(dpi=dpi, alpha=False)
+    # PIL reads the pixmap's own buffer rather than a copy of it (frombytes),
+    # so only one ~25 MB page is held at a time. Same pixels, same text.
+    img = Image.frombuffer("RGB", (pix.width, pix.height), pix.samples_mv, "raw", "RGB", pix.stride, 1)
+    raster_bytes = pix.stride * pix.height
+    rasterized = time.perf_counter()
+    text = pytesseract.image_to_string(img)
+    # The image goes first: the pixmap can't free a buffer that is still shared.
+    del img, pix
+    return text, rasterized - start, time.perf_counter() - rasterized, raster_bytes
+
+
+def _record_page(result):
+    # Worker timings can't reach the parent's spans directly; report them here.
+    text, raster_seconds, ocr_seconds, raster_bytes = result
+    record('rasterize', raster_seconds, pages=1, nbytes=raster_bytes)
+    record('ocr', ocr_seconds, pages=1, nbytes=len(text.encode('utf-8')))
+    return text
+
+
+def _ocr_page_task(args):
+    try:
+        return ocr_page_timed(*args)
+    except Exception as e:
+        # Some pytesseract exceptions can't be unpickled in the parent, which
+        # would break the whole pool; send back a plain error instead.
+        raise RuntimeError(f"OCR failed on page {args[1] + 1}: {e}") from None
+
+
+def page_count(filepath):
+    with fitz.open(filepath) as doc:
+        if doc.needs_pass:
+            raise ValueError("document closed or encrypted")
+        return doc.page_count
+
+
+class OCREngine:
+    def __init__(self, max_workers=None, dpi=DEFAULT_DPI, tesseract_cmd=None):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.dpi = dpi
+        self.tesseract_cmd = tesseract_cmd
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        # Started lazily so importing the app doesn't spawn processes. That makes
+        # it start from a parse thread with the server's threads running, and
+        # forking a threaded process can leave a child stuck on a lock another
+        # thread held; so spawn the workers instead.
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.tesseract_cmd,),
+                )
+            return self._pool
+
+    def ocr_pages(self, filepath, page_numbers=None):
+        # Returns one string per requested page (default: all), in that order.
+        return list(self.iter_ocr_pages(filepath, page_numbers))
+
+    def iter_ocr_pages(self, filepath, page_numbers=None):
+        # All pages are queued on the pool immediately; texts are yielded in
+        # page order as they become available.
+        if page_numbers is None:
+            page_numbers = range(page_count(filepath))
+        page_numbers = list(page_numbers)
+        if len(page_numbers) <= 1 or self.max_workers <= 1:
+            _init_worker(self.tesseract_cmd)
+            for i in page_numbers:
+                yield _record_page(ocr_page_timed(filepath, i, self.dpi))
+            return
+        tasks = [(filepath, i, self.dpi) for i in page_numbers]
+        try:
+            # map() yields results in submission order, whatever order pages finish in.
+            for result in self._get_pool().map(_ocr_page_task, tasks):
+                yield _record_page(result)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next time.
+            self.shutdown()
+            raise
+
+    def ocr_pages_serial(self, filepath, page_numbers=None):
+        _init_worker(self.tesseract_cmd)
+        if page_numbers is None:
+            page_numbers = range(page_count(filepath))
+        return [ocr_page_timed(filepath, i, self.dpi)[0] for i in page_numbers]
+
+    def ocr_text(self, filepath):
+        return "".join(self.ocr_pages(filepath))
+
+    def shutdown(self):
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import threading
+import pandas as pd
+
+# --- On-disk cache of parsed statements, keyed by PDF content + parser version ---
+# Each entry is one pickled DataFrame named "<sha256 of pdf bytes>-<parser version>.pkl".
+# The file mtime doubles as the "last used" timestamp, so LRU eviction is just
+# "delete the oldest files until we are back under the size limit".
+
+CACHE_SUFFIX = '.pkl'
+
+
+def file_digest(filepath, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parser_version(*parts):
+    # Anything that changes parser output (keyword table, regexes, a manual
+    # version bump) goes into parts; a different value misses the old entries.
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(repr(part).encode('utf-8'))
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+
+class ParseCache:
+    def __init__(self, folder, max_bytes=64 * 1024 * 1024):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        if not os.path.exists(self.folder):
+            os.makedirs(self.folder)
+
+    def _path(self, content_hash, version):
+        return os.path.join(self.folder, f"{content_hash}-{version}{CACHE_SUFFIX}")
+
+    def get(self, content_hash, version):
+        path = self._path(content_hash, version)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # A truncated or unreadable entry is just a miss; drop it so it gets rebuilt.
+            print(f"Discarding unreadable cache entry {path}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return df
+
+    def put(self, content_hash, version, df):
+        path = self._path(content_hash, version)
+        # Unique per writer so concurrent uploads of the same file don't collide.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self.evict(version)
+
+    def evict(self, current_version=None):
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.folder, name)
+            # Entries written by an older parser can never be hit again.
+            if current_version and not name.endswith(f"-{current_version}{CACHE_SUFFIX}"):
+                self._remove(path)
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for name in os.listdir(self.folder):
+            if name.endswith(CACHE_SUFFIX):
+                self._remove(os.path.join(self.folder, name))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
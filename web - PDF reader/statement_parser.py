@@ -0,0 +1,342 @@
+import os
+import re
+from collections import namedtuple
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pdfplumber
+from categorizer import Categorizer
+from extraction import iter_page_texts, open_document, DEFAULT_BACKEND, TEXT, OCR, BLANK
+from metrics import span
+from parse_cache import file_digest, parser_version
+
+# --- Statement parsing, independent of Flask ---
+# Everything from "PDF on disk" to "categorized DataFrame": page extraction,
+# the bank format registry, the line parsers and the parse cache. Progress and problems go through a
+# report(message, category) callback, so the same code serves the web upload
+# jobs and the ingest command line.
+
+
+def print_report(message, category='info'):
+    # Default sink for parser messages when nobody is collecting them.
+    print(f"[{category}] {message}")
+
+
+KEYWORDS_TO_CATEGORY = {
+    "grab": "Transport", "mcdonald": "Food", "jollibee": "Food", "meralco": "Utilities",
+    "globe": "Utilities", "sm": "Groceries", "watsons": "Health", "7-eleven": "Groceries",
+    "shopee": "Shopping", "lazada": "Shopping", "netflix": "Entertainment", "venchi": "Dining",
+    "rustic": "Dining", "barbers": "Personal Care", "petron": "Fuel", "google": "Subscriptions",
+    "manam": "Dining", "philippine airl": "Travel", "hotel": "Travel", "landers": "Groceries",
+    "starbucks": "Dining", "waltermart": "Groceries", "cafe": "Dining", "sony": "Entertainment",
+    "playstation": "Entertainment", "steam": "Entertainment", "nike": "Shopping", "uniqlo": "Shopping",
+    "decathlon": "Shopping", "handyman": "Shopping", "naati": "Miscellaneous"
+}
+
+
+categorizer = Categorizer.from_keywords(KEYWORDS_TO_CATEGORY)
+
+
+def categorize(expenses):
+    # One pass over the distinct descriptions instead of a keyword loop per row.
+    if not expenses.empty:
+        with span('categorize', rows=len(expenses)):
+            codes, descriptions = pd.factorize(expenses['Description'])
+            categories = np.asarray(categorizer.categorize_many(descriptions), dtype=object)
+            expenses['Category'] = pd.Categorical(categories[codes])
+    return expenses
+
+
+# This pattern is tuned for clean, text-based PDF data (BPI, Maya)
+TEXT_LINE_PATTERN = re.compile(r"^(?:\w+\s\d{1,2}|\d{1,2}\s\w{3})\s+(\w+\s\d{1,2}|\d{1,2}\s\w{3})\s+(.+?)\s+([\d,.-]+\.\d{2}$)")
+# These split the OCR'd multi-line transactions (UnionBank)
+OCR_DATE_PATTERN = re.compile(r"^(\w{3}\s\d{1,2},\s\d{4})")
+OCR_AMOUNT_PATTERN = re.compile(r"PHP\s*(-?[\d,]+\.\d{2})")
+# Tried in this order; dates without a year get the statement's.
+DATE_FORMATS = ['%B %d %Y', '%b %d %Y', '%d %b %Y']
+
+
+# Bump this whenever parsing logic changes in a way the keyword table and
+# regexes above don't capture, so cached results get thrown away.
+PARSER_REVISION = 6
+
+
+# The original pdfplumber-only text path; bench_parsers.py still measures it.
+def parse_text_based_pdf(filepath, filename, report=print_report):
+    full_text = ""
+    # --- This is the corrected try-except block using the correct exception ---
+    try:
+        with pdfplumber.open(filepath) as pdf:
+            for page in pdf.pages:
+                full_text += (page.extract_text() or "") + "\n"
+    except pdfplumber.utils.exceptions.PdfminerException as e:
+        # This is the correct exception that handles password errors from the underlying library.
+        if "PDFPasswordIncorrect" in str(e):
+            report(f'Could not process "{filename}" because it is password-protected.', 'danger')
+        else:
+            report(f'A PDF parsing error occurred with "{filename}": {e}', 'warning')
+        return pd.DataFrame()
+    except Exception as e:
+        # Catch any other unexpected errors
+        report(f'An unexpected error occurred while processing "{filename}": {e}', 'danger')
+        return pd.DataFrame()
+
+    return parse_text_lines(full_text, filename)
+
+
+# --- Line parsing, a whole statement at a time ---
+# Both parsers work on a column of lines rather than line by line: one regex
+# pass with str.extract, dates through to_datetime with explicit formats and
+# amounts through to_numeric, so the per-line Python work is gone. They return
+# typed columns (datetime64 Date, float Amount, categorical Category/Source).
+
+def statement_lines(full_text):
+    return pd.Series(full_text.split('\n'), dtype='str').str.strip()
+
+
+def statement_year(full_text):
+    year_match = re.search(r'\b(20\d{2})\b', full_text)
+    return int(year_match.group(1)) if year_match else datetime.now().year
+
+
+def parse_dates(dates, year):
+    # Commas dropped, the year appended where only month and day are given,
+    # then each format in turn on whatever the previous ones couldn't read.
+    dates = dates.str.replace(',', '', regex=False).str.strip()
+    dates = dates.where(dates.str.count(r'\S+') >= 3, dates + f' {year}')
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype='datetime64[us]')
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(dates[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def parse_amounts(amounts):
+    # "1,234.56" -> 1234.56; anything that isn't a number becomes NaN.
+    return pd.to_numeric(amounts.str.replace(',', '', regex=False), errors='coerce')
+
+
+def transaction_frame(dates, descriptions, amounts, filename):
+    expenses = pd.DataFrame({
+        'Date': dates.to_numpy(),
+        'Description': descriptions.to_numpy(),
+        'Amount': amounts.to_numpy(dtype=float),
+        'Category': None,
+        'Source': pd.Categorical([filename] * len(dates)),
+    })
+    return categorize(expenses)
+
+
+def parse_text_lines(full_text, filename):
+    if not full_text.strip(): return pd.DataFrame()
+
+    # One row per transaction line; the date kept is the second (posting) one.
+    found = statement_lines(full_text).str.extract(TEXT_LINE_PATTERN).dropna()
+    if found.empty:
+        return pd.DataFrame()
+    dates = parse_dates(found[0], statement_year(full_text))
+    amounts = parse_amounts(found[2])
+    # Negative amounts are payments and credits, not expenses.
+    keep = dates.notna() & (amounts >= 0)
+    if not keep.any():
+        return pd.DataFrame()
+    return transaction_frame(dates[keep], found[1][keep], amounts[keep], filename)
+
+
+def parse_ocr_lines(full_text, filename):
+    if not full_text.strip(): return pd.DataFrame()
+
+    # A date line starts a transaction, the lines up to the next date line are
+    # its description, and a "PHP 1,234.56" line among them its amount (the
+    # last non-negative one). Lines are classified all at once, numbered by
+    # the transaction they belong to, and folded into one row per number.
+    lines = statement_lines(full_text)
+    lines = lines[lines != '']
+    # A plain substring check first, so the regexes only see likely lines.
+    date_strs = lines[lines.str.contains(',', regex=False)].str.extract(OCR_DATE_PATTERN)[0].reindex(lines.index)
+    # Anything before the first date line belongs to no transaction.
+    started = date_strs.notna().cumsum() > 0
+    if not started.any():
+        return pd.DataFrame()
+    lines, date_strs = lines[started], date_strs[started]
+    is_date = date_strs.notna()
+    transaction = is_date.cumsum()
+    amount_lines = lines[~is_date]
+    amount_strs = amount_lines[amount_lines.str.contains('PHP', regex=False)].str.extract(OCR_AMOUNT_PATTERN)[0].dropna()
+
+    # Description pieces: the rest of a date line and plain lines end with a
+    # space, the rest of an amount line doesn't. Each transaction's pieces are
+    # consecutive, so they are glued with one join, with a newline (which no
+    # line contains) in front of every date line to split on afterwards.
+    pieces = lines + ' '
+    amount_rest = lines[amount_strs.index].str.replace(OCR_AMOUNT_PATTERN, '', regex=True).str.strip()
+    pieces.loc[amount_strs.index] = amount_rest
+    date_rest = lines[is_date].str.replace(OCR_DATE_PATTERN, '', regex=True).str.strip()
+    pieces.loc[is_date] = '\n' + (date_rest + ' ').where(date_rest != '', '')
+    descriptions = pd.Series(''.join(pieces.tolist()).split('\n')[1:], index=pd.RangeIndex(1, is_date.sum() + 1), dtype='str')
+    descriptions = descriptions.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+    amounts = parse_amounts(amount_strs)
+    amounts = amounts[amounts >= 0]
+    amounts = amounts.groupby(transaction[amounts.index]).last().reindex(descriptions.index)
+    dates = parse_dates(date_strs[is_date], statement_year(full_text))
+    dates.index = transaction[is_date]
+
+    # Interest, charges and fees aren't purchases. Only the last transaction
+    # has to have an amount; the line-by-line parser kept the others without.
+    keep = ~descriptions.str.contains('Interest|Charge|Fee', regex=True)
+    keep.iloc[-1] = keep.iloc[-1] and pd.notna(amounts.iloc[-1])
+    if not keep.any():
+        return pd.DataFrame()
+    return transaction_frame(dates[keep], descriptions[keep], amounts[keep], filename)
+
+
+# --- Bank formats ---
+# Each supported statement layout registers a fingerprint and the parser for
+# its lines. A fingerprint only sees page 1 (its kind and text) and the
+# document metadata, so picking the format costs one page. The first format
+# that matches parses the file; one that nothing recognizes is turned down
+# before the rest is read, and never reaches OCR.
+
+FirstPage = namedtuple('FirstPage', 'kind text metadata')
+
+
+class BankFormat:
+    def __init__(self, name, fingerprint, parse, ocr=False):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.parse = parse
+        # Whether pages without a text layer are OCR'd; text formats skip them.
+        self.ocr = ocr
+
+
+BANK_FORMATS = []
+
+
+def register_format(name, parse, ocr=False):
+    # Decorates a fingerprint(first_page) -> bool; formats are tried in order.
+    def decorator(fingerprint):
+        BANK_FORMATS.append(BankFormat(name, fingerprint, parse, ocr))
+        return fingerprint
+    return decorator
+
+
+def squeeze(text):
+    # Lowercase, no whitespace, so letter-spaced headings ("P r e p a r e d") match too.
+    return re.sub(r'\s+', '', text).lower()
+
+
+@register_format('Maya', parse_text_lines)
+def is_maya(page):
+    # JasperReports export: "Statement of Account" then "Billing date: ...".
+    if page.kind != TEXT:
+        return False
+    text = squeeze(page.text)
+    return ('jasperreports' in page.metadata.get('creator', '').lower()
+            or text.startswith('statementofaccount') and 'billingdate' in text)
+
+
+@register_format('BPI', parse_text_lines)
+def is_bpi(page):
+    # The cover page reads "Prepared for ... CUSTOMER NUMBER"; pdfplumber doesn't
+    # see the cover and starts at "Statement of Account / Customer Number"
+    # (with "Account" sometimes mirrored, so only the first two words count).
+    text = squeeze(page.text)
+    return page.kind == TEXT and 'customernumber' in text and (
+        'preparedfor' in text or text.startswith('statementof'))
+
+
+@register_format('UnionBank', parse_ocr_lines, ocr=True)
+def is_unionbank(page):
+    # Saved from online banking with "Microsoft: Print To PDF": no text layer,
+    # every glyph drawn as a vector path, so page 1 classifies as OCR.
+    return page.kind == OCR and page.metadata.get('producer', '').lower() == 'microsoft: print to pdf'
+
+
+def identify(first_page):
+    return next((bank for bank in BANK_FORMATS if bank.fingerprint(first_page)), None)
+
+
+class StatementParser:
+    def __init__(self, ocr_engine, parse_cache=None, backend=DEFAULT_BACKEND):
+        self.ocr_engine = ocr_engine
+        self.parse_cache = parse_cache
+        self.backend = backend
+
+    def version(self):
+        return parser_version(
+            PARSER_REVISION, self.backend,
+            # The OCR resolution changes what scanned pages read as.
+            self.ocr_engine.dpi,
+            list(KEYWORDS_TO_CATEGORY.items()),
+            [(bank.name, bank.fingerprint.__name__, bank.parse.__name__, bank.ocr) for bank in BANK_FORMATS],
+            TEXT_LINE_PATTERN.pattern, OCR_DATE_PATTERN.pattern, OCR_AMOUNT_PATTERN.pattern, DATE_FORMATS,
+        )
+
+    def process(self, filepath, report=print_report, content_hash=None, filename=None):
+        # filename: the name the statement came in under, if not the file's own.
+        filename = filename or os.path.basename(filepath)
+        if self.parse_cache is None:
+            return self.parse_uncached(filepath, filename, report)
+
+        # Same bytes + same parser = same result, so skip pdfplumber/OCR entirely.
+        content_hash = content_hash or file_digest(filepath)
+        version = self.version()
+        cached = self.parse_cache.get(content_hash, version)
+        if cached is not None:
+            print(f"Cache hit for {filename}.")
+            cached['Source'] = filename
+            return cached
+
+        expenses = self.parse_uncached(filepath, filename, report)
+        if not expenses.empty:
+            self.parse_cache.put(content_hash, version, expenses)
+        return expenses
+
+    def parse_uncached(self, filepath, filename, report=print_report):
+        # Page 1 decides the bank format; only then is the rest read, each page
+        # from its text layer or (for formats that need it) by OCR, and the
+        # format's own line parser runs over the combined text.
+        try:
+            with span('open', nbytes=os.path.getsize(filepath)) as s:
+                doc = open_document(filepath, self.backend)
+                s.pages = doc.page_count
+            try:
+                with span('extract', pages=1):
+                    kind, text = doc.read_page(0) if doc.page_count else (BLANK, '')
+                    bank = identify(FirstPage(kind, text, doc.metadata))
+                if bank is None:
+                    supported = ', '.join(b.name for b in BANK_FORMATS)
+                    report(f'"{filename}" is not a statement format we recognize (supported: {supported}).', 'warning')
+                    return pd.DataFrame()
+                pages = list(iter_page_texts(doc, self.ocr_engine if bank.ocr else None, (kind, text)))
+            finally:
+                doc.close()
+        except ValueError as e:
+            if "encrypted" in str(e):
+                report(f'Could not process "{filename}" because it is encrypted/password-protected.', 'danger')
+            else:
+                report(f'An unexpected value error occurred with "{filename}": {e}', 'warning')
+            return pd.DataFrame()
+        except pdfplumber.utils.exceptions.PdfminerException as e:
+            report(f'A PDF parsing error occurred with "{filename}": {e}', 'warning')
+            return pd.DataFrame()
+        except Exception as e:
+            report(f'An unexpected error occurred while processing "{filename}": {e}', 'danger')
+            return pd.DataFrame()
+        kinds = [kind for kind, _ in pages]
+        print(f"Read {filename} as {bank.name}: {kinds.count(TEXT)} text page(s), {kinds.count(OCR)} OCR page(s), {kinds.count(BLANK)} blank.")
+        # Page texts don't end in a newline; without one the last line of a
+        # page and the first of the next run together and neither parses.
+        full_text = "\n".join(text for _, text in pages)
+
+        with span('parse', nbytes=len(full_text.encode('utf-8'))) as s:
+            expenses = bank.parse(full_text, filename)
+            s.rows = len(expenses)
+        if expenses.empty:
+            print(f"Could not extract transactions from {filename} with the {bank.name} parser.")
+            return pd.DataFrame()
+        print(f"Success with the {bank.name} parser for {filename}.")
+        return expenses
@@ -0,0 +1,462 @@
+import base64
+import json
+import sqlite3
+import threading
+import pandas as pd
+from duplicates import MERGE
+
+# --- Persistent transaction store (SQLite, WAL mode) ---
+# Replaces the module-level DataFrame: data survives restarts, several
+# processes can share the file, and an insert only touches the new rows.
+# Duplicates are rejected by the unique index on the same columns the old
+# drop_duplicates() used.
+#
+# Per (month, category) sums and counts are kept in monthly_category_totals by
+# triggers, in the same transaction as the insert/delete that changes them, so
+# the summary table and chart never have to scan the transaction history.
+#
+# With a DuplicateMatcher (duplicates.py), add() also catches near-duplicates
+# from other statements, row by row: flagged in duplicate_flags, or merged
+# (not inserted).
+
+COLUMNS = ['Date', 'Description', 'Amount', 'Category', 'Source']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id          INTEGER PRIMARY KEY,
+    date        TEXT NOT NULL,      -- YYYY-MM-DD
+    description TEXT NOT NULL,
+    amount      REAL NOT NULL,
+    category    TEXT NOT NULL,
+    source      TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_dedup ON transactions (date, description, amount, source);
+CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category);
+CREATE INDEX IF NOT EXISTS transactions_source ON transactions (source);
+"""
+
+# Schema changes applied on top of SCHEMA, keyed by PRAGMA user_version.
+MIGRATIONS = {
+    1: """
+CREATE TABLE IF NOT EXISTS monthly_category_totals (
+    month    TEXT NOT NULL,     -- YYYY-MM
+    category TEXT NOT NULL,
+    total    REAL NOT NULL,
+    count    INTEGER NOT NULL,
+    PRIMARY KEY (month, category)
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS transactions_totals_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO monthly_category_totals (month, category, total, count)
+    VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount, 1)
+    ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_totals_delete AFTER DELETE ON transactions BEGIN
+    UPDATE monthly_category_totals SET total = total - OLD.amount, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+    DELETE FROM monthly_category_totals
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count <= 0;
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_totals_update AFTER UPDATE OF date, amount, category ON transactions BEGIN
+    UPDATE monthly_category_totals SET total = total - OLD.amount, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category;
+    DELETE FROM monthly_category_totals
+    WHERE month = substr(OLD.date, 1, 7) AND category = OLD.category AND count <= 0;
+    INSERT INTO monthly_category_totals (month, category, total, count)
+    VALUES (substr(NEW.date, 1, 7), NEW.category, NEW.amount, 1)
+    ON CONFLICT (month, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+""",
+    # Lets /api/transactions page through rows sorted by amount via the index.
+    2: """
+CREATE INDEX IF NOT EXISTS transactions_amount ON transactions (amount);
+""",
+    # Per-source totals for the charts, and a counter bumped on every change so
+    # rendered charts can be cached (and ETagged) against it.
+    3: """
+CREATE TABLE IF NOT EXISTS source_totals (
+    source TEXT PRIMARY KEY,
+    total  REAL NOT NULL,
+    count  INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('data_version', 0);
+CREATE TRIGGER IF NOT EXISTS transactions_sources_insert AFTER INSERT ON transactions BEGIN
+    INSERT INTO source_totals (source, total, count) VALUES (NEW.source, NEW.amount, 1)
+    ON CONFLICT (source) DO UPDATE SET total = total + excluded.total, count = count + 1;
+    UPDATE store_meta SET value = value + 1 WHERE key = 'data_version';
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_sources_delete AFTER DELETE ON transactions BEGIN
+    UPDATE source_totals SET total = total - OLD.amount, count = count - 1 WHERE source = OLD.source;
+    DELETE FROM source_totals WHERE source = OLD.source AND count <= 0;
+    UPDATE store_meta SET value = value + 1 WHERE key = 'data_version';
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_sources_update AFTER UPDATE OF amount, source ON transactions BEGIN
+    UPDATE source_totals SET total = total - OLD.amount, count = count - 1 WHERE source = OLD.source;
+    DELETE FROM source_totals WHERE source = OLD.source AND count <= 0;
+    INSERT INTO source_totals (source, total, count) VALUES (NEW.source, NEW.amount, 1)
+    ON CONFLICT (source) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS transactions_version_update AFTER UPDATE ON transactions BEGIN
+    UPDATE store_meta SET value = value + 1 WHERE key = 'data_version';
+END;
+""",
+    # Statement files already parsed into the store, by content hash.
+    4: """
+CREATE TABLE IF NOT EXISTS ingested_files (
+    content_hash TEXT PRIMARY KEY,
+    filename     TEXT NOT NULL,
+    transactions INTEGER NOT NULL,
+    ingested_at  TEXT NOT NULL DEFAULT (datetime('now'))
+) WITHOUT ROWID;
+""",
+    # Near-duplicate blocking (same amount, nearby date) and the rows flagged
+    # as possible duplicates of an earlier one.
+    5: """
+CREATE INDEX IF NOT EXISTS transactions_amount_date ON transactions (amount, date);
+CREATE TABLE IF NOT EXISTS duplicate_flags (
+    transaction_id INTEGER PRIMARY KEY,
+    duplicate_of   INTEGER NOT NULL,
+    score          REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS duplicate_flags_of ON duplicate_flags (duplicate_of);
+CREATE TRIGGER IF NOT EXISTS transactions_duplicates_delete AFTER DELETE ON transactions BEGIN
+    DELETE FROM duplicate_flags WHERE transaction_id = OLD.id OR duplicate_of = OLD.id;
+END;
+""",
+    # A random id per database, so two databases' data_versions can be told apart.
+    6: """
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('database_id', abs(random()));
+""",
+}
+
+# Only an exact duplicate is skipped; anything else wrong with a row is an error.
+INSERT_SQL = (
+    "INSERT INTO transactions (date, description, amount, category, source) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (date, description, amount, source) DO NOTHING"
+)
+
+SELECT_COLUMNS = "date AS Date, description AS Description, amount AS Amount, category AS Category, source AS Source"
+
+# Sort keys for paging; each has an index, and id (the rowid) breaks ties.
+SORTABLE = ('date', 'amount', 'category', 'source')
+
+
+def filter_sql(filters):
+    # filters: date_from/date_to (YYYY-MM-DD), category, source, min_amount,
+    # max_amount, search (substring of the description, case-insensitive).
+    # Returns a WHERE fragment (or '') and its parameters.
+    clauses, params = [], []
+    filters = filters or {}
+    for key, clause in (
+        ('date_from', "date >= ?"),
+        ('date_to', "date <= ?"),
+        ('category', "category = ?"),
+        ('source', "source = ?"),
+        ('min_amount', "amount >= ?"),
+        ('max_amount', "amount <= ?"),
+    ):
+        if filters.get(key) is not None:
+            clauses.append(clause)
+            params.append(filters[key])
+    if filters.get('search'):
+        clauses.append("description LIKE ? ESCAPE '\\'")
+        escaped = filters['search'].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        params.append(f"%{escaped}%")
+    return " AND ".join(clauses), params
+
+
+def frame_rows(df):
+    # (date, description, amount, category, source) tuples, as stored and exported.
+    return list(zip(
+        pd.to_datetime(df['Date']).dt.strftime('%Y-%m-%d'),
+        df['Description'].astype(str),
+        df['Amount'].astype(float),
+        df['Category'].astype(str),
+        df['Source'].astype(str),
+    ))
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(row_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+
+
+class TransactionStore:
+    def __init__(self, path, duplicates=None):
+        self.path = path
+        self.duplicates = duplicates
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        conn = self.connect()
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target in sorted(v for v in MIGRATIONS if v > version):
+            conn.executescript(MIGRATIONS[target])
+            if target in (1, 3):
+                # Databases created before the aggregates existed need a backfill.
+                self.rebuild_aggregates()
+            conn.execute(f"PRAGMA user_version = {target}")
+
+    def connect(self):
+        # One connection per thread; sqlite3 connections can't be shared freely.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, df, report=None):
+        # Returns how many rows were new (merged near-duplicates aren't).
+        if df is None or df.empty:
+            return 0
+        rows = frame_rows(df)
+        # A row the parser couldn't date or price has no place in the table
+        # (both columns are NOT NULL): leave it out, and say so.
+        valid = [row for row in rows if isinstance(row[0], str) and row[2] == row[2]]
+        if len(valid) < len(rows):
+            message = f"Skipped {len(rows) - len(valid)} transaction(s) with no date or amount."
+            if report is not None:
+                report(message, 'warning')
+            else:
+                print(message)
+        rows = valid
+        if not rows:
+            return 0
+        conn = self.connect()
+        if self.duplicates is not None:
+            with conn:
+                return sum(self._add_checked(conn, row) for row in rows)
+        with conn:
+            # rowcount, not total_changes: the latter also counts the trigger writes.
+            return conn.executemany(INSERT_SQL, rows).rowcount
+
+    def _add_checked(self, conn, row):
+        # One row through the near-duplicate check; returns 1 if it was inserted.
+        date, description, amount, category, source = row
+        first, last = self.duplicates.date_range(date)
+        # The block: an (amount, date) index range, other statements only.
+        candidates = conn.execute(
+            "SELECT id, description FROM transactions "
+            "WHERE amount = ? AND date BETWEEN ? AND ? AND source != ?",
+            (amount, first, last, source),
+        )
+        match = self.duplicates.best_match(description, candidates)
+        if match is not None and self.duplicates.mode == MERGE:
+            return 0
+        cursor = conn.execute(INSERT_SQL, row)
+        if cursor.rowcount and match is not None:
+            conn.execute(
+                "INSERT OR REPLACE INTO duplicate_flags (transaction_id, duplicate_of, score) VALUES (?, ?, ?)",
+                (cursor.lastrowid, match[0], round(match[1], 3)),
+            )
+        return cursor.rowcount
+
+    def duplicate_count(self):
+        return self.connect().execute("SELECT COUNT(*) FROM duplicate_flags").fetchone()[0]
+
+    def flagged_duplicates(self, limit=100):
+        # Flagged rows next to the row each one duplicates, most similar first.
+        cursor = self.connect().execute(
+            "SELECT f.transaction_id, f.score, "
+            "t.date, t.description, t.amount, t.source, o.id, o.date, o.description, o.source "
+            "FROM duplicate_flags f JOIN transactions t ON t.id = f.transaction_id "
+            "JOIN transactions o ON o.id = f.duplicate_of "
+            "ORDER BY f.score DESC, f.transaction_id LIMIT ?",
+            (limit,),
+        )
+        return [
+            {'id': r[0], 'score': r[1], 'date': r[2], 'description': r[3], 'amount': r[4], 'source': r[5],
+             'duplicate_of': {'id': r[6], 'date': r[7], 'description': r[8], 'source': r[9]}}
+            for r in cursor
+        ]
+
+    def resolve_duplicate(self, transaction_id, merge):
+        # merge: delete the flagged row (the trigger drops its flag); otherwise
+        # keep it and just drop the flag. Returns False if it wasn't flagged.
+        conn = self.connect()
+        with conn:
+            if not conn.execute("SELECT 1 FROM duplicate_flags WHERE transaction_id = ?", (transaction_id,)).fetchone():
+                return False
+            if merge:
+                conn.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+            else:
+                conn.execute("DELETE FROM duplicate_flags WHERE transaction_id = ?", (transaction_id,))
+        return True
+
+    def mark_ingested(self, content_hash, filename, transactions):
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ingested_files (content_hash, filename, transactions) VALUES (?, ?, ?)",
+                (content_hash, filename, transactions),
+            )
+
+    def ingested_hashes(self):
+        return {row[0] for row in self.connect().execute("SELECT content_hash FROM ingested_files")}
+
+    def count(self):
+        return self.connect().execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def is_empty(self):
+        return self.connect().execute("SELECT 1 FROM transactions LIMIT 1").fetchone() is None
+
+    def to_frame(self):
+        # Newest first, like the old sort_values(by='Date', ascending=False).
+        df = pd.read_sql_query(
+            f"SELECT {SELECT_COLUMNS} FROM transactions ORDER BY date DESC, id",
+            self.connect(),
+        )
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def page(self, filters=None, sort='date', descending=True, limit=50, cursor=None):
+        # Keyset pagination: the cursor is the (sort value, id) of the last row
+        # sent, so each page is an index range scan however deep it is.
+        # Returns (rows, next_cursor); next_cursor is None on the last page.
+        if sort not in SORTABLE:
+            raise ValueError(f"cannot sort by {sort!r}")
+        where, params = filter_sql(filters)
+        clauses = [where] if where else []
+        if cursor:
+            clauses.append(f"({sort}, id) {'<' if descending else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            f"SELECT id, date, description, amount, category, source FROM transactions "
+            f"{'WHERE ' + ' AND '.join(clauses) if clauses else ''} "
+            f"ORDER BY {sort} {direction}, id {direction} LIMIT ?"
+        )
+        params.append(limit + 1)
+        cursor_rows = self.connect().execute(sql, params).fetchall()
+        rows = [
+            {'id': r[0], 'date': r[1], 'description': r[2], 'amount': r[3], 'category': r[4], 'source': r[5]}
+            for r in cursor_rows[:limit]
+        ]
+        next_cursor = None
+        if len(cursor_rows) > limit:
+            last = rows[-1]
+            next_cursor = encode_cursor([last[sort], last['id']])
+        return rows, next_cursor
+
+    def iter_batches(self, filters=None, batch_size=1000):
+        # Yields lists of (date, description, amount, category, source) tuples,
+        # newest first, without ever holding the whole history in memory.
+        where, params = filter_sql(filters)
+        rows = self.connect().execute(
+            f"SELECT date, description, amount, category, source FROM transactions "
+            f"{'WHERE ' + where if where else ''} ORDER BY date DESC, id",
+            params,
+        )
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+    def monthly_totals(self):
+        # (Month, Category, Amount, Count) straight from the maintained aggregates.
+        return pd.read_sql_query(
+            "SELECT month AS Month, category AS Category, total AS Amount, count AS Count "
+            "FROM monthly_category_totals",
+            self.connect(),
+        )
+
+    def monthly_summary(self):
+        # Month x Category sums plus a Total column, newest month first;
+        # the same table the results page used to pivot from the raw rows.
+        totals = self.monthly_totals()
+        if totals.empty:
+            return pd.DataFrame()
+        summary = totals.pivot(index='Month', columns='Category', values='Amount').fillna(0)
+        summary.columns.name = 'Category'
+        summary['Total'] = summary.sum(axis=1)
+        return summary.sort_index(ascending=False)
+
+    def category_means(self):
+        return pd.read_sql_query(
+            "SELECT category AS Category, SUM(total) / SUM(count) AS Amount "
+            "FROM monthly_category_totals GROUP BY category",
+            self.connect(),
+        ).set_index('Category')['Amount']
+
+    def source_totals(self):
+        return pd.read_sql_query(
+            "SELECT source AS Source, total AS Amount, count AS Count FROM source_totals",
+            self.connect(),
+        ).set_index('Source')['Amount']
+
+    def data_version(self):
+        # Changes whenever any transaction is added, changed or removed.
+        row = self.connect().execute("SELECT value FROM store_meta WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+
+    def database_id(self):
+        # Picked when the database was created (or migrated); a new file gets a new one.
+        row = self.connect().execute("SELECT value FROM store_meta WHERE key = 'database_id'").fetchone()
+        return row[0] if row else 0
+
+    def rebuild_aggregates(self):
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM monthly_category_totals")
+            conn.execute(
+                "INSERT INTO monthly_category_totals (month, category, total, count) "
+                "SELECT substr(date, 1, 7), category, SUM(amount), COUNT(*) FROM transactions "
+                "GROUP BY substr(date, 1, 7), category"
+            )
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'source_totals'").fetchone():
+                conn.execute("DELETE FROM source_totals")
+                conn.execute(
+                    "INSERT INTO source_totals (source, total, count) "
+                    "SELECT source, SUM(amount), COUNT(*) FROM transactions GROUP BY source"
+                )
+                conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'data_version'")
+
+    def check_aggregates(self, tolerance=0.005):
+        # Compares the maintained totals with a full GROUP BY over the raw rows.
+        # Returns the (month, category) cells that disagree; empty means consistent.
+        conn = self.connect()
+        fresh = {
+            (month, category): (total, count)
+            for month, category, total, count in conn.execute(
+                "SELECT substr(date, 1, 7), category, SUM(amount), COUNT(*) FROM transactions "
+                "GROUP BY substr(date, 1, 7), category"
+            )
+        }
+        kept = {
+            (month, category): (total, count)
+            for month, category, total, count in conn.execute(
+                "SELECT month, category, total, count FROM monthly_category_totals"
+            )
+        }
+        mismatches = []
+        for key in fresh.keys() | kept.keys():
+            a, b = fresh.get(key, (0.0, 0)), kept.get(key, (0.0, 0))
+            if a[1] != b[1] or abs(a[0] - b[0]) > tolerance:
+                mismatches.append((key, a, b))
+        return mismatches
+
+    def clear(self):
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM duplicate_flags")
+            conn.execute("DELETE FROM transactions")
+            conn.execute("DELETE FROM monthly_category_totals")
+            conn.execute("DELETE FROM source_totals")
+            conn.execute("DELETE FROM ingested_files")
@@ -0,0 +1,129 @@
+import random
+from datetime import date, timedelta
+import fitz
+import pandas as pd
+
+# --- Synthetic statements for benchmarks ---
+# Deterministic (seeded) statements in the layouts the parsers understand, as
+# long as you like, so scaling can be measured without real customer PDFs.
+#
+#   text    - BPI style text layer: "Jan 5 Jan 6 MERCHANT 1,234.56"
+#   scanned - UnionBank style lines rendered to images, so only OCR can read them
+#
+# Each also carries what the bank format fingerprints look for (BPI's header
+# lines, UnionBank's "Print To PDF" producer), so the parser takes them for
+# the real thing.
+#
+# fill_history grows a store's transaction history through HISTORY_SIZES, for
+# benchmarks of what gets slower as the database does.
+
+MERCHANTS = [
+    "GRAB PH", "MCDONALDS MAKATI", "JOLLIBEE BGC", "MERALCO ONLINE", "GLOBE TELECOM", "SM SUPERMARKET",
+    "WATSONS GLORIETTA", "7-ELEVEN TAGUIG", "SHOPEE PH", "LAZADA PH", "NETFLIX.COM", "STARBUCKS UPTOWN",
+    "PETRON EDSA", "GOOGLE *YOUTUBE", "LANDERS ALABANG", "UNIQLO MEGAMALL", "NIKE BGC", "DECATHLON",
+    "MANAM CAFE", "PHILIPPINE AIRLINES", "STEAM PURCHASE", "RUSTIC MORNING CAFE", "HANDYMAN DO IT BEST",
+    "UNKNOWN MERCHANT 042", "VENCHI ROCKWELL", "WALTERMART", "BARBERS CLUB", "SONY STORE",
+]
+
+CATEGORIES = ["Food", "Transport", "Groceries", "Shopping", "Dining", "Travel", "Utilities", "Uncategorized"]
+HISTORY_SIZES = (1000, 10000, 50000, 100000, 200000, 500000)
+STATEMENT_ROWS = 1000
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792
+LINE_HEIGHT = 16
+TOP, BOTTOM = 60, 60
+
+
+def statement_lines(count, seed=0, year=2025):
+    # (date, merchant, amount) tuples in date order.
+    rng = random.Random(seed)
+    start = date(year, 1, 1)
+    days = sorted(rng.randrange(365) for _ in range(count))
+    return [(start + timedelta(days=day), rng.choice(MERCHANTS), round(rng.uniform(35, 25000), 2)) for day in days]
+
+
+def history_batch(n, offset, rng):
+    # n stored transactions from ten years of STATEMENT_ROWS-row statements,
+    # numbered from offset so every description is unique.
+    start = date(2015, 1, 1)
+    return pd.DataFrame({
+        'Date': pd.to_datetime([start + timedelta(days=rng.randrange(3650)) for _ in range(n)]),
+        'Description': [f"{rng.choice(MERCHANTS)} {offset + i}" for i in range(n)],
+        'Amount': [round(rng.uniform(50, 20000), 2) for _ in range(n)],
+        'Category': [rng.choice(CATEGORIES) for _ in range(n)],
+        'Source': [f"statement-{(offset + i) // STATEMENT_ROWS}.pdf" for i in range(n)],
+    })
+
+
+def fill_history(store, max_rows, seed=0):
+    # Adds to store a step at a time, yielding each of HISTORY_SIZES up to
+    # max_rows once the store holds that many rows.
+    rng = random.Random(seed)
+    rows = 0
+    for size in HISTORY_SIZES:
+        if size > max_rows:
+            break
+        store.add(history_batch(size - rows, rows, rng))
+        rows = size
+        yield size
+
+
+def _chunks(lines, per_page):
+    for i in range(0, len(lines), per_page):
+        yield lines[i:i + per_page]
+
+
+def text_page_lines(chunk, year=2025):
+    text = [f"Statement of Account {year} (synthetic)", "Customer Number 000000-0-00-0000000"]
+    for day, merchant, amount in chunk:
+        posted = day + timedelta(days=1)
+        text.append(f"{day:%b} {day.day} {posted:%b} {posted.day} {merchant} {amount:,.2f}")
+    return text
+
+
+def scan_page_lines(chunk, year=2025):
+    text = [f"Synthetic Bank Transactions {year}", ""]
+    for day, merchant, amount in chunk:
+        text += [f"{day:%b %d, %Y}", merchant, f"PHP {amount:,.2f}"]
+    return text
+
+
+def statement_text(count, seed=0, year=2025, scanned=False):
+    # What the line parsers get for a statement of count transactions, without
+    # the PDF in between (pages are just run together).
+    page_lines = scan_page_lines if scanned else text_page_lines
+    return '\n'.join(page_lines(statement_lines(count, seed, year), year))
+
+
+def make_text_statement(path, pages, seed=0, year=2025):
+    # Returns the number of transaction lines written.
+    per_page = (PAGE_HEIGHT - TOP - BOTTOM) // LINE_HEIGHT - 2
+    lines = statement_lines(pages * per_page, seed, year)
+    doc = fitz.open()
+    for chunk in _chunks(lines, per_page):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        # One call per page; a call per line makes long statements slow to build.
+        page.insert_text((40, TOP), text_page_lines(chunk, year), fontsize=9, lineheight=LINE_HEIGHT / 9)
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return len(lines)
+
+
+def make_scanned_statement(path, pages, seed=0, year=2025, dpi=150):
+    # Each transaction takes three lines (date, merchant, PHP amount), like the
+    # UnionBank export; every page is then flattened into a single image.
+    per_page = ((PAGE_HEIGHT - TOP - BOTTOM) // LINE_HEIGHT - 2) // 3
+    lines = statement_lines(pages * per_page, seed, year)
+    out = fitz.open()
+    for chunk in _chunks(lines, per_page):
+        src = fitz.open()
+        page = src.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        page.insert_text((40, TOP), scan_page_lines(chunk, year), fontsize=11, lineheight=LINE_HEIGHT / 11)
+        pix = page.get_pixmap(dpi=dpi)
+        src.close()
+        scan = out.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        scan.insert_image(scan.rect, pixmap=pix)
+    out.set_metadata({'producer': 'Microsoft: Print To PDF', 'title': f"Synthetic Bank Transactions {year}"})
+    out.save(path, garbage=3, deflate=True)
+    out.close()
+    return len(lines)